@@ -1,19 +1,22 @@
 from fastapi import FastAPI, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-import os, zipfile, shutil, tempfile
-from utils.parser import parse_terraform_files
-from utils.diagram_builder import build_graph_json
-from utils.multi_parser import detect_language_and_services, detect_language_and_services_with_references
-from utils.enhanced_diagram_builder import build_comprehensive_diagram
-from utils.workflow_diagram_builder import build_workflow_diagram, generate_mermaid_workflow
-from utils.terraform_diagram_generator import generate_terraform_diagram, generate_terraform_hcl
-from utils.aws_diagram_generator import AWSInfrastructureDiagramGenerator
-from utils.readme_generator import generate_readme
-from utils.frontend_preview_generator import generate_frontend_preview
-from utils.layered_diagram_generator import generate_layered_architecture_diagram
-from utils.project_overview_generator import generate_project_overview
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from concurrent.futures import ThreadPoolExecutor
+import os, zipfile, time, uuid, json
+from utils.repository_scanner import SCAN_VERSION
+from utils.analysis_pipeline import (
+    prepare_analysis, build_sections, build_response, select_sections, scan_archive,
+    page_references, pipeline_stages, PIPELINE_STAGES, SECTION_NAMES, LLM_BUDGET_SECONDS
+)
+from utils.readme_generator import stream_readme_events
+from utils.reference_table import dump_references, load_references, references_from_dicts
+from utils.disk_cache import DiskCache
+from utils.file_analysis_cache import FileAnalysisCache
+from utils.ttl_store import TTLStore
+from utils.upload_limits import UploadRejected, UploadSizeLimitMiddleware, claim_upload
 
 app = FastAPI(title="Intellens")
 
@@ -25,103 +28,305 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized request bodies before they are read
+app.add_middleware(UploadSizeLimitMiddleware)
+
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Bump when analysis output changes so stale cached results are not served
+ANALYZER_VERSION = "9"
+
+# Relative cache paths are taken from backend/, whichever directory the server runs from
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Whole-response cache keyed by archive content hash
+result_cache = DiskCache(
+    os.path.join(BACKEND_DIR, os.getenv("INTELLENS_RESULT_CACHE_DIR", "cache/results")),
+    int(os.getenv("INTELLENS_RESULT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+)
+
+# Per-file analysis cache keyed by blob hash, so re-uploads only rescan changed files
+file_cache = FileAnalysisCache(
+    os.path.join(BACKEND_DIR, os.getenv("INTELLENS_FILE_CACHE_PATH", "cache/file_analysis.sqlite3")),
+    SCAN_VERSION,
+    int(os.getenv("INTELLENS_FILE_CACHE_MAX_ENTRIES", "500000"))
+)
+
+# Background analysis jobs; finished jobs are kept for INTELLENS_JOB_TTL seconds.
+# Queued and running jobs are never evicted, so their workers can always report back.
+job_executor = ThreadPoolExecutor(max_workers=int(os.getenv("INTELLENS_JOB_WORKERS", "2")))
+job_store = TTLStore(
+    int(os.getenv("INTELLENS_JOB_MAX_ENTRIES", "1000")),
+    int(os.getenv("INTELLENS_JOB_TTL", "3600")),
+    pinned=lambda job: job["status"] in ("queued", "running")
+)
+
+# Analyses kept for on-demand sections (GET /analysis/{id}/sections/{name})
+analysis_store = TTLStore(
+    int(os.getenv("INTELLENS_ANALYSIS_MAX_ENTRIES", "200")),
+    int(os.getenv("INTELLENS_ANALYSIS_TTL", "3600"))
+)
+
+# Largest page served by GET /analysis/{id}/references
+MAX_REFERENCE_PAGE_SIZE = 1000
+
 # Mount static files for frontend
 app.mount("/frontend", StaticFiles(directory="../frontend"), name="frontend")
 app.mount("/images", StaticFiles(directory="../images"), name="images")
 
-@app.post("/upload")
-async def upload_project(file: UploadFile = File(...)):
-    """Upload a zip file containing project files."""
-    # Save uploaded file
-    temp_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(temp_path, "wb") as f:
-        f.write(await file.read())
-
-    # Extract the zip
-    extract_dir = tempfile.mkdtemp()
-    with zipfile.ZipFile(temp_path, "r") as zip_ref:
-        zip_ref.extractall(extract_dir)
-
-    # Parse all files for languages and services with references
-    languages, services_with_refs, all_connections, file_details = detect_language_and_services_with_references(extract_dir)
-    
-    # Convert to legacy format for backward compatibility
-    services = {name: data['count'] for name, data in services_with_refs.items()}
-    
-    # Also parse Terraform specifically for backward compatibility
-    tf_services, tf_connections = parse_terraform_files(extract_dir)
-    
-    # Build comprehensive diagram
-    diagram_data = build_comprehensive_diagram(languages, services, all_connections)
-    
-    # Build workflow diagram
-    workflow_data = build_workflow_diagram(languages, services, file.filename.split('.')[0], file_details)
-    
-    # Generate Mermaid syntax
-    mermaid_syntax = generate_mermaid_workflow(languages, services, file.filename.split('.')[0])
-    
-    # Generate Terraform diagram
-    terraform_data = generate_terraform_diagram(languages, services, file.filename.split('.')[0])
-    terraform_hcl = generate_terraform_hcl(terraform_data['terraform_config'])
-    
-    # Generate AWS Infrastructure diagram from actual Terraform files or project analysis
-    aws_generator = AWSInfrastructureDiagramGenerator()
-    aws_infrastructure_data = aws_generator.generate_infrastructure_diagram(
-        extract_dir, 
-        file.filename.split('.')[0],
-        languages,
-        services
-    )
+def parse_sections(sections):
+    """Turn a comma-separated sections= value into a list of section names (None means all)."""
+    if sections is None:
+        return None
+    names = [name.strip() for name in sections.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SECTION_NAMES]
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(unknown)}. Available: {', '.join(SECTION_NAMES)}")
+    return names
+
+def _save_readme(readme_filename, readme_content):
+    # Save README to project (create a downloadable version)
+    with open(os.path.join(UPLOAD_DIR, readme_filename), 'w', encoding='utf-8') as f:
+        f.write(readme_content)
+
+def run_analysis(archive, archive_hash, project_name, progress=None, sections=None):
+    """Analyze an archive, going through the result cache, and save its README.
     
-    # Generate README
-    readme_content = generate_readme(languages, services, file_details, file.filename.split('.')[0])
+    Only the requested sections are computed. The analysis is kept in
+    analysis_store under the returned "analysis_id", so other sections can be
+    fetched later without re-uploading. The response only carries a sample of
+    each service's code references; the stored analysis keeps all of them.
+    """
+    analysis_id = uuid.uuid4().hex
     
-    # Generate frontend preview
-    frontend_preview = generate_frontend_preview(languages, services, file_details, extract_dir)
+    # Serve repeated uploads of the same archive from the result cache
+    cache_key = f"{ANALYZER_VERSION}:{project_name}:{archive_hash}"
+    cached_response = result_cache.get(cache_key)
+    if cached_response is not None:
+        response_data = select_sections(cached_response, sections)
+        references = result_cache.get(f"{cache_key}:references")
+        analysis_store.set(analysis_id, {
+            "analysis": None,
+            "sections": {name: cached_response[name] for name in SECTION_NAMES},
+            "degraded_sections": [],
+            "references": (load_references(references) if references is not None
+                           else references_from_dicts(cached_response["services_with_references"]))
+        })
+        readme_path = os.path.join(UPLOAD_DIR, cached_response["readme_filename"])
+        if not os.path.exists(readme_path):
+            _save_readme(cached_response["readme_filename"], cached_response["readme_content"])
+    else:
+        analysis = prepare_analysis(archive, project_name, file_cache=file_cache, progress=progress, sections=sections)
+        outputs, degraded = build_sections(analysis, SECTION_NAMES if sections is None else sections, progress=progress)
+        response_data = build_response(analysis, outputs, degraded, sections)
+        analysis_store.set(analysis_id, {
+            "analysis": analysis,
+            "sections": outputs,
+            "degraded_sections": degraded,
+            "references": analysis["services_with_references"]
+        })
+        
+        # Degraded results are not cached, so the next upload gets another shot at Bedrock
+        if sections is None and not degraded:
+            result_cache.set(cache_key, response_data)
+            result_cache.set(f"{cache_key}:references", dump_references(analysis["services_with_references"]))
+        if "readme_content" in outputs:
+            _save_readme(response_data["readme_filename"], outputs["readme_content"])
     
-    # Generate layered architecture diagram
-    layered_diagram = generate_layered_architecture_diagram(languages, services, file.filename.split('.')[0], file_details)
+    return {**response_data, "analysis_id": analysis_id}
+
+@app.post("/upload")
+async def upload_project(file: UploadFile = File(...), sections: Optional[str] = None):
+    """Upload a zip file containing project files.
     
-    # Generate project overview
-    project_overview = generate_project_overview(languages, services, file_details, file.filename.split('.')[0])
+    sections is an optional comma-separated list of output sections to compute
+    (e.g. sections=aws_infrastructure_diagram,terraform_hcl); by default all are.
+    """
+    try:
+        requested = parse_sections(sections)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    project_name = file.filename.split('.')[0]
     
-    # Save README to project (create a downloadable version)
-    readme_filename = f"{file.filename.split('.')[0]}_README.md"
-    readme_path = os.path.join(UPLOAD_DIR, readme_filename)
-    with open(readme_path, 'w', encoding='utf-8') as f:
-        f.write(readme_content)
+    # Hash the spooled upload in place, in chunks
+    try:
+        archive, archive_hash = await claim_upload(file)
+    except UploadRejected as e:
+        return JSONResponse({"error": e.message}, status_code=e.status_code)
+    
+    try:
+        response_data = await run_in_threadpool(run_analysis, archive, archive_hash, project_name, None, requested)
+    except zipfile.BadZipFile:
+        return JSONResponse({"error": "Uploaded file is not a valid zip archive"}, status_code=400)
+    except UploadRejected as e:
+        return JSONResponse({"error": e.message}, status_code=e.status_code)
+    finally:
+        archive.close()
     
-    # Legacy diagram for TF only
-    tf_diagram_data = build_graph_json(tf_services, tf_connections)
-
-    response_data = {
-        "comprehensive_diagram": diagram_data,
-        "workflow_diagram": workflow_data,
-        "mermaid_syntax": mermaid_syntax,
-        "terraform_diagram": tf_diagram_data,
-        "terraform_infrastructure": terraform_data,
-        "terraform_hcl": terraform_hcl,
-        "aws_infrastructure_diagram": aws_infrastructure_data,
-        "languages": languages,
-        "services": services,
-        "services_with_references": services_with_refs,
-        "terraform_services": tf_services,
-        "file_details": file_details,
-        "readme_content": readme_content,
-        "readme_filename": readme_filename,
-        "frontend_preview": frontend_preview,
-        "layered_diagram": layered_diagram,
-        "project_overview": project_overview
+    return JSONResponse(content=response_data, media_type="application/json; charset=utf-8")
+
+def _compute_section(analysis_id, name):
+    """Return a stored analysis' section, computing and storing it if needed (None if the analysis is gone)."""
+    entry = analysis_store.get(analysis_id)
+    if entry is None:
+        return None
+    if name not in entry["sections"]:
+        outputs, degraded = build_sections(entry["analysis"], [name])
+        entry = analysis_store.update(analysis_id, lambda current: {
+            **current,
+            "sections": {**current["sections"], **outputs},
+            "degraded_sections": sorted(set(current["degraded_sections"]) | set(degraded))
+        })
+        if entry is None:
+            return None
+        if name == "readme_content":
+            _save_readme(f"{entry['analysis']['project_name']}_README.md", outputs[name])
+    return {
+        "analysis_id": analysis_id,
+        "section": name,
+        "content": entry["sections"][name],
+        "degraded": name in entry["degraded_sections"]
     }
+
+@app.get("/analysis/{analysis_id}/sections/{name}")
+async def get_analysis_section(analysis_id: str, name: str):
+    """Return one output section of a stored analysis, computing it on first request."""
+    if name not in SECTION_NAMES:
+        return JSONResponse({"error": f"Unknown section: {name}"}, status_code=404)
+    section = await run_in_threadpool(_compute_section, analysis_id, name)
+    if section is None:
+        return JSONResponse({"error": "Analysis not found"}, status_code=404)
+    return JSONResponse(content=section, media_type="application/json; charset=utf-8")
+
+@app.get("/analysis/{analysis_id}/references")
+async def get_analysis_references(analysis_id: str, service: str, offset: int = 0, limit: int = 100):
+    """Page through the stored code references of one detected service."""
+    if offset < 0 or limit < 1:
+        return JSONResponse({"error": "offset must be >= 0 and limit >= 1"}, status_code=400)
+    limit = min(limit, MAX_REFERENCE_PAGE_SIZE)
+    entry = analysis_store.get(analysis_id)
+    if entry is None:
+        return JSONResponse({"error": "Analysis not found"}, status_code=404)
+    page = page_references(entry["references"], service, offset, limit)
+    if page is None:
+        return JSONResponse({"error": f"Service not detected: {service}"}, status_code=404)
+    return JSONResponse(content={"analysis_id": analysis_id, **page}, media_type="application/json; charset=utf-8")
+
+@app.post("/readme/stream")
+async def stream_readme(file: UploadFile = File(...)):
+    """Upload a zip file and stream its generated README as Server-Sent Events.
     
-    # Cleanup after building response
-    os.remove(temp_path)
-    shutil.rmtree(extract_dir)
+    Deterministic sections are sent as soon as the scan finishes, AI-written
+    Markdown follows as Bedrock produces it (for at most the LLM budget), and a
+    final "done" event carries the assembled README.
+    """
+    project_name = file.filename.split('.')[0]
     
-    return JSONResponse(content=response_data, media_type="application/json; charset=utf-8")
+    try:
+        archive, archive_hash = await claim_upload(file)
+    except UploadRejected as e:
+        return JSONResponse({"error": e.message}, status_code=e.status_code)
+    
+    try:
+        scan = await run_in_threadpool(scan_archive, archive, file_cache)
+    except zipfile.BadZipFile:
+        return JSONResponse({"error": "Uploaded file is not a valid zip archive"}, status_code=400)
+    except UploadRejected as e:
+        return JSONResponse({"error": e.message}, status_code=e.status_code)
+    finally:
+        archive.close()
+    
+    services = {name: data['count'] for name, data in scan.services_with_refs.items()}
+    readme_filename = f"{project_name}_README.md"
+    
+    def events():
+        for event, data in stream_readme_events(scan.languages, services, scan.file_details, project_name, LLM_BUDGET_SECONDS):
+            if event == "done":
+                # Save README to project (create a downloadable version)
+                with open(os.path.join(UPLOAD_DIR, readme_filename), 'w', encoding='utf-8') as f:
+                    f.write(data["readme"])
+                data = {**data, "readme_filename": readme_filename}
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _run_job(job_id, archive, archive_hash, project_name, sections=None):
+    """Worker body for POST /jobs: run the pipeline and record progress on the job."""
+    # Jobs are replaced rather than mutated, so readers always see a consistent snapshot
+    def set_fields(**fields):
+        job_store.update(job_id, lambda job: {**job, **fields, "updated": time.time()})
+    
+    def progress(stage, status):
+        job_store.update(job_id, lambda job: {**job, "stages": {**job["stages"], stage: status}, "updated": time.time()})
+    
+    set_fields(status="running")
+    try:
+        response_data = run_analysis(archive, archive_hash, project_name, progress=progress, sections=sections)
+    except zipfile.BadZipFile:
+        set_fields(status="failed", error="Uploaded file is not a valid zip archive")
+    except UploadRejected as e:
+        set_fields(status="failed", error=e.message)
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        set_fields(status="failed", error=str(e))
+    else:
+        # Cache hits skip the pipeline, so mark every stage that was asked for done
+        job_store.update(job_id, lambda job: {
+            **job,
+            "status": "completed",
+            "result": response_data,
+            "stages": {stage: "skipped" if status == "skipped" else "done" for stage, status in job["stages"].items()},
+            "updated": time.time()
+        })
+    finally:
+        archive.close()
+
+@app.post("/jobs")
+async def create_job(file: UploadFile = File(...), sections: Optional[str] = None):
+    """Queue a zip file for analysis and return its job id right away.
+    
+    Accepts the same sections= selector as /upload.
+    """
+    try:
+        requested = parse_sections(sections)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    project_name = file.filename.split('.')[0]
+    
+    try:
+        archive, archive_hash = await claim_upload(file)
+    except UploadRejected as e:
+        return JSONResponse({"error": e.message}, status_code=e.status_code)
+    
+    job_id = uuid.uuid4().hex
+    stages = pipeline_stages(requested)
+    now = time.time()
+    job_store.set(job_id, {
+        "job_id": job_id,
+        "project_name": project_name,
+        "status": "queued",
+        "stages": {stage: "pending" if stage in stages else "skipped" for stage in PIPELINE_STAGES},
+        "created": now,
+        "updated": now,
+        "result": None,
+        "error": None
+    })
+    job_executor.submit(_run_job, job_id, archive, archive_hash, project_name, requested)
+    
+    return JSONResponse({"job_id": job_id, "status": "queued"}, status_code=202)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return a job's status, per-stage progress and, once completed, its result."""
+    job = job_store.get(job_id)
+    if job is None:
+        return JSONResponse({"error": "Job not found"}, status_code=404)
+    return JSONResponse(content=job, media_type="application/json; charset=utf-8")
 
 @app.get("/download-readme/{filename}")
 async def download_readme(filename: str):
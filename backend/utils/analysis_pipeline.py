@@ -0,0 +1,260 @@
+import os
+import zipfile
+from .diagram_builder import build_graph_json
+from .repository_scanner import scan_repository
+from .enhanced_diagram_builder import build_comprehensive_diagram
+from .workflow_diagram_builder import build_workflow_diagram, generate_mermaid_workflow
+from .terraform_diagram_generator import generate_terraform_diagram, generate_terraform_hcl
+from .aws_diagram_generator import AWSInfrastructureDiagramGenerator
+from .readme_generator import generate_readme
+from .frontend_preview_generator import generate_frontend_preview
+from .layered_diagram_generator import generate_layered_architecture_diagram
+from .project_overview_generator import generate_project_overview
+from .source_tree import ZipSource
+from .upload_limits import check_archive
+from .task_graph import run_task_graph
+from .llm_client import llm_budget, llm_section
+from .reference_table import references_to_dicts
+
+# Generator threads per analysis; most branches wait on Bedrock rather than the CPU
+PIPELINE_WORKERS = int(os.getenv("INTELLENS_PIPELINE_WORKERS", "8"))
+
+# Wall-clock budget shared by every Bedrock call of one analysis. Sections
+# still waiting when it runs out use their deterministic fallbacks.
+LLM_BUDGET_SECONDS = float(os.getenv("INTELLENS_LLM_BUDGET_SECONDS", "45"))
+
+# Code references per service included in the upload response; the rest are
+# served page by page from GET /analysis/{id}/references
+REFERENCE_SAMPLE_SIZE = int(os.getenv("INTELLENS_REFERENCE_SAMPLE_SIZE", "20"))
+
+# Stages reported to progress callbacks. Everything after the scan runs as a
+# task graph, so these finish in whatever order their branches complete.
+PIPELINE_STAGES = [
+    "scan",
+    "comprehensive_diagram",
+    "workflow_diagram",
+    "mermaid_syntax",
+    "terraform_diagram",
+    "terraform_infrastructure",
+    "terraform_hcl",
+    "aws_infrastructure_diagram",
+    "readme_content",
+    "frontend_preview",
+    "layered_diagram",
+    "project_overview",
+]
+
+def scan_archive(archive, file_cache=None):
+    """Scan an uploaded zip without running the output generators."""
+    with zipfile.ZipFile(archive, "r") as zip_ref:
+        check_archive(zip_ref)
+        return scan_repository(ZipSource(zip_ref), cache=file_cache)
+
+# Output sections that can be requested individually, in response order
+SECTION_NAMES = [
+    "comprehensive_diagram",
+    "workflow_diagram",
+    "mermaid_syntax",
+    "terraform_diagram",
+    "terraform_infrastructure",
+    "terraform_hcl",
+    "aws_infrastructure_diagram",
+    "readme_content",
+    "frontend_preview",
+    "layered_diagram",
+    "project_overview",
+]
+
+# Sections a section is computed from, besides the scan results
+SECTION_DEPENDENCIES = {
+    "terraform_hcl": ["terraform_infrastructure"],
+}
+
+# Shown when the frontend preview is asked for after the archive was closed
+FRONTEND_PREVIEW_UNAVAILABLE = (
+    '<div style="padding: 20px; text-align: center;"><h3>Preview not rendered</h3>'
+    '<p>Upload the project again with the frontend_preview section selected.</p></div>'
+)
+
+# Response keys in their original order; the scan results are always included
+RESPONSE_KEYS = [
+    "comprehensive_diagram",
+    "workflow_diagram",
+    "mermaid_syntax",
+    "terraform_diagram",
+    "terraform_infrastructure",
+    "terraform_hcl",
+    "aws_infrastructure_diagram",
+    "languages",
+    "services",
+    "services_with_references",
+    "terraform_services",
+    "file_details",
+    "readme_content",
+    "readme_filename",
+    "frontend_preview",
+    "layered_diagram",
+    "project_overview",
+    "degraded_sections",
+]
+
+def prepare_analysis(archive, project_name, file_cache=None, progress=None, sections=None):
+    """Scan an uploaded zip and return everything the section generators need.
+
+    The result is a plain dict that can be kept around to compute further
+    sections later with build_sections. The frontend preview is the only
+    section that reads file contents, so it is rendered here while the
+    archive is open, and only when sections (all of them by default) needs
+    it. progress, if given, is called as progress(stage, status) with status
+    "running" or "done". Raises zipfile.BadZipFile for invalid archives and
+    UploadRejected when the archive breaks the configured limits.
+    """
+    with zipfile.ZipFile(archive, "r") as zip_ref:
+        check_archive(zip_ref)
+        # Read the project straight from the archive, without extracting it to disk
+        source = ZipSource(zip_ref)
+
+        # Walk the project once for languages, services with references and Terraform
+        if progress:
+            progress("scan", "running")
+        scan = scan_repository(source, cache=file_cache)
+        languages, services_with_refs, file_details = scan.languages, scan.services_with_refs, scan.file_details
+
+        # Convert to legacy format for backward compatibility
+        services = {name: data['count'] for name, data in services_with_refs.items()}
+        if progress:
+            progress("scan", "done")
+
+        frontend_preview = None
+        if sections is None or "frontend_preview" in _with_dependencies(sections):
+            if progress:
+                progress("frontend_preview", "running")
+            frontend_preview = generate_frontend_preview(languages, services, file_details, source)
+            if progress:
+                progress("frontend_preview", "done")
+
+    return {
+        "project_name": project_name,
+        "languages": languages,
+        "services": services,
+        "services_with_references": services_with_refs,
+        "connections": scan.connections,
+        "file_details": file_details,
+        # Terraform services and connections for backward compatibility
+        "terraform_services": scan.tf_services,
+        "terraform_connections": scan.tf_connections,
+        "terraform_data": scan.terraform_data,
+        "frontend_preview": frontend_preview,
+    }
+
+def build_sections(analysis, sections, progress=None):
+    """Compute the named sections from a prepared analysis.
+
+    Returns ({name: output}, degraded_section_names). Dependencies of the
+    requested sections are computed too and included in the outputs.
+    """
+    for name in sections:
+        if name not in SECTION_NAMES:
+            raise ValueError(f"Unknown section: {name}")
+
+    project_name = analysis["project_name"]
+    languages = analysis["languages"]
+    services = analysis["services"]
+    file_details = analysis["file_details"]
+
+    # The generators only need the scan results, so run them side by side
+    generators = {
+        "comprehensive_diagram": lambda: build_comprehensive_diagram(languages, services, analysis["connections"]),
+        "workflow_diagram": lambda: build_workflow_diagram(languages, services, project_name, file_details),
+        "mermaid_syntax": lambda: generate_mermaid_workflow(languages, services, project_name),
+        # Legacy diagram for TF only
+        "terraform_diagram": lambda: build_graph_json(analysis["terraform_services"], analysis["terraform_connections"]),
+        "terraform_infrastructure": lambda: generate_terraform_diagram(languages, services, project_name),
+        "terraform_hcl": lambda terraform_infrastructure: generate_terraform_hcl(terraform_infrastructure['terraform_config']),
+        # AWS Infrastructure diagram from actual Terraform files or project analysis
+        "aws_infrastructure_diagram": lambda: AWSInfrastructureDiagramGenerator().generate_infrastructure_diagram(
+            None,
+            project_name,
+            languages,
+            services,
+            terraform_data=analysis["terraform_data"]
+        ),
+        "readme_content": lambda: generate_readme(languages, services, file_details, project_name),
+        "layered_diagram": lambda: generate_layered_architecture_diagram(languages, services, project_name, file_details),
+        "project_overview": lambda: generate_project_overview(languages, services, file_details, project_name),
+    }
+
+    needed = _with_dependencies(sections)
+    tasks = {
+        name: (_in_section(name, generators[name]), SECTION_DEPENDENCIES.get(name, []))
+        for name in SECTION_NAMES if name in needed and name != "frontend_preview"
+    }
+    with llm_budget(LLM_BUDGET_SECONDS) as degraded:
+        outputs = run_task_graph(tasks, max_workers=PIPELINE_WORKERS, progress=progress)
+    # Rendered up front by prepare_analysis, if it was asked for while the archive was open
+    if "frontend_preview" in needed:
+        outputs["frontend_preview"] = analysis["frontend_preview"] or FRONTEND_PREVIEW_UNAVAILABLE
+    return outputs, sorted(degraded)
+
+def build_response(analysis, outputs, degraded, sections=None):
+    """Lay out the response payload: scan results plus the computed sections (or just those in sections)."""
+    outputs = select_sections(outputs, sections)
+    values = {
+        "languages": analysis["languages"],
+        "services": analysis["services"],
+        "services_with_references": sample_references(analysis["services_with_references"]),
+        "terraform_services": analysis["terraform_services"],
+        "file_details": analysis["file_details"],
+        "readme_filename": f"{analysis['project_name']}_README.md",
+        "degraded_sections": degraded,
+        **outputs,
+    }
+    return {key: values[key] for key in RESPONSE_KEYS if key in values}
+
+def sample_references(services_with_refs):
+    """Cut each service's references down to its count and the first REFERENCE_SAMPLE_SIZE entries."""
+    return references_to_dicts(services_with_refs, REFERENCE_SAMPLE_SIZE)
+
+def page_references(services_with_refs, service, offset, limit):
+    """Return one page of a service's stored references, or None if the service was not detected."""
+    data = services_with_refs.get(service)
+    if data is None:
+        return None
+    return {
+        "service": service,
+        "count": data["count"],
+        "stored": len(data["references"]),
+        "offset": offset,
+        "limit": limit,
+        "references": data["references"].to_dicts(offset, offset + limit),
+    }
+
+def select_sections(response_data, sections):
+    """Drop the sections not asked for from a full response payload."""
+    if sections is None:
+        return response_data
+    return {key: value for key, value in response_data.items() if key not in SECTION_NAMES or key in sections}
+
+def pipeline_stages(sections=None):
+    """PIPELINE_STAGES that run when only sections are requested (all by default)."""
+    if sections is None:
+        return list(PIPELINE_STAGES)
+    needed = set(_with_dependencies(sections)) | {"scan"}
+    return [stage for stage in PIPELINE_STAGES if stage in needed]
+
+def _with_dependencies(sections):
+    needed = []
+    pending = list(sections)
+    while pending:
+        name = pending.pop()
+        if name not in needed:
+            needed.append(name)
+            pending.extend(SECTION_DEPENDENCIES.get(name, []))
+    return needed
+
+def _in_section(name, func):
+    """Wrap a task so fallbacks inside it are reported under the section name."""
+    def run(**kwargs):
+        with llm_section(name):
+            return func(**kwargs)
+    return run
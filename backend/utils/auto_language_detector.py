@@ -1,6 +1,8 @@
 import os
 import re
 from collections import defaultdict
+from .path_filter import walk_project, looks_minified
+from .file_classifier import is_binary_file
 
 def detect_language_from_content(content, filename):
     """Detect programming language from file content and patterns."""
@@ -53,17 +55,21 @@ def auto_detect_languages(folder_path):
     """Automatically detect all programming languages in the project."""
     languages = defaultdict(int)
     
-    for root, _, files in os.walk(folder_path):
+    for root, files in walk_project(folder_path):
         for file in files:
             if file.startswith('.'):
                 continue
                 
             full_path = os.path.join(root, file)
             detected_lang = None
+            if is_binary_file(full_path):
+                continue
             
             try:
                 with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
+                if looks_minified(content):
+                    continue
                 
                 # Check shebang first
                 shebang_lang = detect_language_from_shebang(content)
@@ -1,5 +1,98 @@
+import os
 import re
 from collections import defaultdict
+from .path_filter import walk_project, looks_minified
+from .file_classifier import is_binary_file
+
+AWS_SERVICE_MAP = {
+    'lambda': 'AWS Lambda',
+    's3': 'AWS S3',
+    'ec2': 'AWS EC2',
+    'rds': 'AWS RDS',
+    'dynamodb': 'AWS DynamoDB',
+    'iot': 'AWS IoT Core',
+    'kinesis': 'AWS Kinesis',
+    'firehose': 'AWS Kinesis Data Firehose',
+    'greengrass': 'AWS IoT Greengrass',
+    'lex': 'Amazon Lex',
+    'sqs': 'AWS SQS',
+    'sns': 'AWS SNS',
+    'cloudformation': 'AWS CloudFormation',
+    'cloudwatch': 'AWS CloudWatch'
+}
+
+AWS_PATTERNS = [
+    r'aws[_-]([a-zA-Z0-9]+)',
+    r'amazonaws\.com/([a-zA-Z0-9-]+)',
+    r'\b(lambda|s3|ec2|rds|dynamodb|iot|kinesis|firehose|greengrass|lex|sqs|sns|cloudformation|cloudwatch|apigateway|cognito|amplify)\b',
+    r'@aws-sdk/([a-zA-Z0-9-]+)',
+    r'boto3\.',
+    r'aws\s+([a-zA-Z0-9]+)',
+    r'AWS::([a-zA-Z0-9:]+)'
+]
+
+# Lowercase literal every AWS_PATTERNS match must contain (None = no cheap guard)
+AWS_PATTERN_LITERALS = ['aws', 'amazonaws.com/', None, '@aws-sdk/', 'boto3.', 'aws', 'aws::']
+
+AWS_KEYWORDS = ['lambda', 's3', 'ec2', 'rds', 'dynamodb', 'iot', 'kinesis', 'firehose', 'greengrass',
+                'lex', 'sqs', 'sns', 'cloudformation', 'cloudwatch', 'apigateway', 'cognito', 'amplify']
+
+CLOUD_PATTERNS = {
+    r'\.s3\.': 'AWS S3',
+    r'\.ec2\.': 'AWS EC2', 
+    r'\.lambda\.': 'AWS Lambda',
+    r'\.rds\.': 'AWS RDS',
+    r'\.dynamodb\.': 'AWS DynamoDB',
+    r'azure\.': 'Microsoft Azure',
+    r'gcp\.': 'Google Cloud Platform',
+    r'kubernetes': 'Kubernetes',
+    r'docker': 'Docker',
+    r'redis': 'Redis',
+    r'mongodb': 'MongoDB',
+    r'postgresql': 'PostgreSQL',
+    r'mysql': 'MySQL',
+    r'nginx': 'Nginx',
+    r'apache': 'Apache',
+    r'terraform': 'Terraform',
+    r'express': 'Express.js',
+    r'fastapi': 'FastAPI',
+    r'django': 'Django',
+    r'flask': 'Flask',
+    r'react': 'React',
+    r'vue': 'Vue.js',
+    r'angular': 'Angular'
+}
+
+# Import patterns used for code references (case-sensitive), with the literal each match contains
+REFERENCE_IMPORT_PATTERNS = [
+    (r'import\s+([a-zA-Z0-9_-]+)', 'Import', 'import'),
+    (r'from\s+([a-zA-Z0-9_.-]+)', 'Import', 'from'),
+    (r'require\([\'"]([a-zA-Z0-9_.-]+)[\'"]', 'Require', 'require('),
+    (r'@([a-zA-Z0-9_-]+)/', 'NPM Package', '@'),
+]
+
+# Import patterns used by the legacy counter (case-sensitive)
+IMPORT_PATTERNS = [
+    r'import\s+([a-zA-Z0-9_-]+)',
+    r'from\s+([a-zA-Z0-9_.-]+)',
+    r'require\([\'"]([a-zA-Z0-9_.-]+)[\'"]',
+    r'@([a-zA-Z0-9_-]+)/',
+    r'pip\s+install\s+([a-zA-Z0-9_-]+)',
+    r'npm\s+install\s+([a-zA-Z0-9_-]+)',
+    r'yarn\s+add\s+([a-zA-Z0-9_-]+)'
+]
+
+# Lowercase literals that cover every reference pattern: any line without one cannot match
+SIGNATURE_KEYWORDS = (['aws', 'boto3.'] + AWS_KEYWORDS
+                      + [p.replace('\\', '') for p in CLOUD_PATTERNS]
+                      + [literal for _, _, literal in REFERENCE_IMPORT_PATTERNS])
+
+# References kept per service; counts keep going past the cap
+MAX_REFERENCES_PER_SERVICE = int(os.getenv('INTELLENS_MAX_REFERENCES_PER_SERVICE', '5000'))
+
+# Longest code excerpt stored with a reference. Minified bundles put a whole
+# file on one line, so longer lines are cut to a window around the match.
+MAX_REFERENCE_CODE_CHARS = 240
 
 def clean_service_name(service_name):
     """Clean and normalize service names to prevent concatenation."""
@@ -18,220 +111,196 @@ def clean_service_name(service_name):
     
     return service_name
 
-def auto_detect_services_with_references(content, file_path):
-    """Detect services and track their code references."""
-    services = defaultdict(lambda: {'count': 0, 'references': []})
-    lines = content.split('\n')
+# Non-ASCII characters that re.IGNORECASE treats as equal to an ASCII letter
+_IGNORECASE_FOLDS = [('\u0130', 'i'), ('\u0131', 'i'), ('\u017f', 's'), ('\u212a', 'k')]
+
+def _fold_case(text):
+    """Lowercase text so that ASCII patterns match it as re.IGNORECASE would."""
+    if not text.isascii():
+        # str.replace scans in C; str.translate goes through a dict lookup per character
+        for char, folded in _IGNORECASE_FOLDS:
+            if char in text:
+                text = text.replace(char, folded)
+    return text.lower()
+
+def reference_excerpt(line, start, end):
+    """Return the stripped line, cut down to a window around line[start:end] if it is long."""
+    code = line.strip()
+    if len(code) <= MAX_REFERENCE_CODE_CHARS:
+        return code
+    indent = len(line) - len(line.lstrip())
+    start, end = start - indent, end - indent
+    left = max(0, start - max(0, MAX_REFERENCE_CODE_CHARS - (end - start)) // 2)
+    right = min(len(code), left + MAX_REFERENCE_CODE_CHARS)
+    left = max(0, right - MAX_REFERENCE_CODE_CHARS)
+    return ('...' if left else '') + code[left:right] + ('...' if right < len(code) else '')
+
+def _literal_alternation(words):
+    """Build a trie-shaped regex for a set of literals (an Aho-Corasick-style prefilter)."""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
     
-    aws_service_map = {
-        'lambda': 'AWS Lambda',
-        's3': 'AWS S3',
-        'ec2': 'AWS EC2',
-        'rds': 'AWS RDS',
-        'dynamodb': 'AWS DynamoDB',
-        'iot': 'AWS IoT Core',
-        'kinesis': 'AWS Kinesis',
-        'firehose': 'AWS Kinesis Data Firehose',
-        'greengrass': 'AWS IoT Greengrass',
-        'lex': 'Amazon Lex',
-        'sqs': 'AWS SQS',
-        'sns': 'AWS SNS',
-        'cloudformation': 'AWS CloudFormation',
-        'cloudwatch': 'AWS CloudWatch'
-    }
+    return build(trie)
+
+class ServiceSignatureMatcher:
+    """Compiled service signatures matched in a single pass over file text.
     
-    aws_patterns = [
-        r'aws[_-]([a-zA-Z0-9]+)',
-        r'amazonaws\.com/([a-zA-Z0-9-]+)',
-        r'\b(lambda|s3|ec2|rds|dynamodb|iot|kinesis|firehose|greengrass|lex|sqs|sns|cloudformation|cloudwatch|apigateway|cognito|amplify)\b',
-        r'@aws-sdk/([a-zA-Z0-9-]+)',
-        r'boto3\.',
-        r'aws\s+([a-zA-Z0-9]+)',
-        r'AWS::([a-zA-Z0-9:]+)'
-    ]
+    Every reference pattern contains at least one of SIGNATURE_KEYWORDS, so a
+    single trie-shaped keyword regex run over the case-folded file finds all
+    lines that can produce a reference. Only those lines are re-checked with
+    the individual patterns, in the original pattern order, so the references
+    produced are identical to checking every pattern on every line. Cloud
+    patterns are plain literals, so on ASCII lines they are found with
+    str.find instead of a regex.
+    """
     
-    for line_num, line in enumerate(lines, 1):
-        for pattern in aws_patterns:
-            matches = re.finditer(pattern, line, re.IGNORECASE)
-            for match in matches:
-                match_text = match.group(1) if match.groups() else match.group(0)
-                clean_name = aws_service_map.get(match_text.lower(), f'AWS {match_text.capitalize()}')
-                clean_name = clean_service_name(clean_name)
-                
-                services[clean_name]['count'] += 1
-                services[clean_name]['references'].append({
-                    'file': file_path,
-                    'line': line_num,
-                    'code': line.strip(),
-                    'match': match.group(0)
-                })
+    def __init__(self):
+        self.aws_patterns = [(re.compile(p, re.IGNORECASE), literal)
+                             for p, literal in zip(AWS_PATTERNS, AWS_PATTERN_LITERALS)]
+        # Cloud patterns are plain literals once their escapes are removed
+        self.cloud_patterns = [(re.compile(p, re.IGNORECASE), p.replace('\\', ''), clean_service_name(service))
+                               for p, service in CLOUD_PATTERNS.items()]
+        self.import_patterns = [(re.compile(p), literal) for p, _, literal in REFERENCE_IMPORT_PATTERNS]
+        
+        self.keywords = re.compile(_literal_alternation(SIGNATURE_KEYWORDS))
+        
+        self._aws_names = {}
+        self._import_names = {
+            'aws': clean_service_name('AWS SDK'),
+            'react': clean_service_name('React'),
+            'vue': clean_service_name('Vue.js')
+        }
     
-    cloud_patterns = {
-        r'\.s3\.': 'AWS S3',
-        r'\.ec2\.': 'AWS EC2', 
-        r'\.lambda\.': 'AWS Lambda',
-        r'\.rds\.': 'AWS RDS',
-        r'\.dynamodb\.': 'AWS DynamoDB',
-        r'azure\.': 'Microsoft Azure',
-        r'gcp\.': 'Google Cloud Platform',
-        r'kubernetes': 'Kubernetes',
-        r'docker': 'Docker',
-        r'redis': 'Redis',
-        r'mongodb': 'MongoDB',
-        r'postgresql': 'PostgreSQL',
-        r'mysql': 'MySQL',
-        r'nginx': 'Nginx',
-        r'apache': 'Apache',
-        r'terraform': 'Terraform',
-        r'express': 'Express.js',
-        r'fastapi': 'FastAPI',
-        r'django': 'Django',
-        r'flask': 'Flask',
-        r'react': 'React',
-        r'vue': 'Vue.js',
-        r'angular': 'Angular'
-    }
+    def candidate_lines(self, content):
+        """Return the sorted 1-based line numbers that contain a signature keyword."""
+        text = _fold_case(content)
+        
+        hits = []
+        line_num = 1
+        pos = 0
+        for match in self.keywords.finditer(text):
+            start = match.start()
+            line_num += text.count('\n', pos, start)
+            pos = start
+            if not hits or hits[-1] != line_num:
+                hits.append(line_num)
+        return hits
     
-    for line_num, line in enumerate(lines, 1):
-        for pattern, service in cloud_patterns.items():
-            matches = list(re.finditer(pattern, line, re.IGNORECASE))
-            for match in matches:
-                clean_name = clean_service_name(service)
-                services[clean_name]['count'] += 1
-                services[clean_name]['references'].append({
+    def _aws_name(self, match_text):
+        key = match_text.lower()
+        name = self._aws_names.get(key)
+        if name is None:
+            name = clean_service_name(AWS_SERVICE_MAP.get(key, f'AWS {match_text.capitalize()}'))
+            if key == match_text:
+                self._aws_names[key] = name
+        return name
+    
+    def match(self, content, file_path):
+        """Detect services in content and collect their code references."""
+        services = defaultdict(lambda: {'count': 0, 'references': []})
+        
+        candidates = self.candidate_lines(content)
+        if not candidates:
+            return {}
+        
+        lines = content.split('\n')
+        candidate_lines = []
+        for line_num in candidates:
+            line = lines[line_num - 1]
+            candidate_lines.append((line_num, line, _fold_case(line)))
+        
+        def add(name, line_num, line, start, end):
+            entry = services[name]
+            entry['count'] += 1
+            if len(entry['references']) < MAX_REFERENCES_PER_SERVICE:
+                entry['references'].append({
                     'file': file_path,
                     'line': line_num,
-                    'code': line.strip(),
-                    'match': match.group(0)
+                    'code': reference_excerpt(line, start, end),
+                    'match': line[start:end]
                 })
-    
-    # Also check import patterns for additional references
-    import_patterns = [
-        (r'import\s+([a-zA-Z0-9_-]+)', 'Import'),
-        (r'from\s+([a-zA-Z0-9_.-]+)', 'Import'),
-        (r'require\([\'"]([a-zA-Z0-9_.-]+)[\'"]', 'Require'),
-        (r'@([a-zA-Z0-9_-]+)/', 'NPM Package'),
-    ]
-    
-    for line_num, line in enumerate(lines, 1):
-        for pattern, import_type in import_patterns:
-            matches = re.finditer(pattern, line)
-            for match in matches:
-                match_text = match.group(1)
-                if 'aws' in match_text.lower():
-                    clean_name = clean_service_name('AWS SDK')
-                    services[clean_name]['count'] += 1
-                    services[clean_name]['references'].append({
-                        'file': file_path,
-                        'line': line_num,
-                        'code': line.strip(),
-                        'match': match.group(0)
-                    })
-                elif 'react' in match_text.lower():
-                    clean_name = clean_service_name('React')
-                    services[clean_name]['count'] += 1
-                    services[clean_name]['references'].append({
-                        'file': file_path,
-                        'line': line_num,
-                        'code': line.strip(),
-                        'match': match.group(0)
-                    })
-                elif 'vue' in match_text.lower():
-                    clean_name = clean_service_name('Vue.js')
-                    services[clean_name]['count'] += 1
-                    services[clean_name]['references'].append({
-                        'file': file_path,
-                        'line': line_num,
-                        'code': line.strip(),
-                        'match': match.group(0)
-                    })
-    
-    # Remove services with no references
-    return {name: data for name, data in services.items() if data['references']}
+        
+        for line_num, line, lowered in candidate_lines:
+            for pattern, literal in self.aws_patterns:
+                if literal and literal not in lowered:
+                    continue
+                for match in pattern.finditer(line):
+                    match_text = match.group(1) if pattern.groups else match.group(0)
+                    add(self._aws_name(match_text), line_num, line, match.start(), match.end())
+        
+        for line_num, line, lowered in candidate_lines:
+            # Case folding keeps ASCII positions, so offsets in lowered are offsets in line
+            ascii_line = line.isascii()
+            for pattern, literal, name in self.cloud_patterns:
+                if literal not in lowered:
+                    continue
+                if ascii_line:
+                    start = lowered.find(literal)
+                    while start >= 0:
+                        add(name, line_num, line, start, start + len(literal))
+                        start = lowered.find(literal, start + len(literal))
+                else:
+                    for match in pattern.finditer(line):
+                        add(name, line_num, line, match.start(), match.end())
+        
+        # Also check import patterns for additional references
+        for line_num, line, lowered in candidate_lines:
+            for pattern, literal in self.import_patterns:
+                if literal not in line:
+                    continue
+                for match in pattern.finditer(line):
+                    match_text = match.group(1).lower()
+                    if 'aws' in match_text:
+                        add(self._import_names['aws'], line_num, line, match.start(), match.end())
+                    elif 'react' in match_text:
+                        add(self._import_names['react'], line_num, line, match.start(), match.end())
+                    elif 'vue' in match_text:
+                        add(self._import_names['vue'], line_num, line, match.start(), match.end())
+        
+        # Remove services with no references
+        return {name: data for name, data in services.items() if data['references']}
+
+_signature_matcher = ServiceSignatureMatcher()
+
+_legacy_aws_patterns = [re.compile(p, re.IGNORECASE) for p in AWS_PATTERNS]
+_legacy_cloud_patterns = [(re.compile(p, re.IGNORECASE), service) for p, service in CLOUD_PATTERNS.items()]
+_legacy_import_patterns = [re.compile(p) for p in IMPORT_PATTERNS]
+
+def auto_detect_services_with_references(content, file_path):
+    """Detect services and track their code references."""
+    return _signature_matcher.match(content, file_path)
 
 def auto_detect_services(content):
     """Legacy function for backward compatibility."""
     services = defaultdict(int)
     
-    aws_service_map = {
-        'lambda': 'AWS Lambda',
-        's3': 'AWS S3',
-        'ec2': 'AWS EC2',
-        'rds': 'AWS RDS',
-        'dynamodb': 'AWS DynamoDB',
-        'iot': 'AWS IoT Core',
-        'kinesis': 'AWS Kinesis',
-        'firehose': 'AWS Kinesis Data Firehose',
-        'greengrass': 'AWS IoT Greengrass',
-        'lex': 'Amazon Lex',
-        'sqs': 'AWS SQS',
-        'sns': 'AWS SNS',
-        'cloudformation': 'AWS CloudFormation',
-        'cloudwatch': 'AWS CloudWatch'
-    }
-    
-    aws_patterns = [
-        r'aws[_-]([a-zA-Z0-9]+)',
-        r'amazonaws\.com/([a-zA-Z0-9-]+)',
-        r'\b(lambda|s3|ec2|rds|dynamodb|iot|kinesis|firehose|greengrass|lex|sqs|sns|cloudformation|cloudwatch|apigateway|cognito|amplify)\b',
-        r'@aws-sdk/([a-zA-Z0-9-]+)',
-        r'boto3\.',
-        r'aws\s+([a-zA-Z0-9]+)',
-        r'AWS::([a-zA-Z0-9:]+)'
-    ]
-    
-    for pattern in aws_patterns:
-        matches = re.findall(pattern, content, re.IGNORECASE)
+    for pattern in _legacy_aws_patterns:
+        matches = pattern.findall(content)
         for match in matches:
             if isinstance(match, tuple):
                 match = match[0] if match[0] else match[1]
-            clean_name = aws_service_map.get(match.lower(), f'AWS {match.capitalize()}')
+            clean_name = AWS_SERVICE_MAP.get(match.lower(), f'AWS {match.capitalize()}')
             clean_name = clean_service_name(clean_name)
             services[clean_name] += 1
     
-    cloud_patterns = {
-        r'\.s3\.': 'AWS S3',
-        r'\.ec2\.': 'AWS EC2', 
-        r'\.lambda\.': 'AWS Lambda',
-        r'\.rds\.': 'AWS RDS',
-        r'\.dynamodb\.': 'AWS DynamoDB',
-        r'azure\.': 'Microsoft Azure',
-        r'gcp\.': 'Google Cloud Platform',
-        r'kubernetes': 'Kubernetes',
-        r'docker': 'Docker',
-        r'redis': 'Redis',
-        r'mongodb': 'MongoDB',
-        r'postgresql': 'PostgreSQL',
-        r'mysql': 'MySQL',
-        r'nginx': 'Nginx',
-        r'apache': 'Apache',
-        r'terraform': 'Terraform',
-        r'express': 'Express.js',
-        r'fastapi': 'FastAPI',
-        r'django': 'Django',
-        r'flask': 'Flask',
-        r'react': 'React',
-        r'vue': 'Vue.js',
-        r'angular': 'Angular'
-    }
-    
-    for pattern, service in cloud_patterns.items():
-        if re.search(pattern, content, re.IGNORECASE):
+    for pattern, service in _legacy_cloud_patterns:
+        if pattern.search(content):
             clean_name = clean_service_name(service)
             services[clean_name] += 1
     
-    import_patterns = [
-        r'import\s+([a-zA-Z0-9_-]+)',
-        r'from\s+([a-zA-Z0-9_.-]+)',
-        r'require\([\'"]([a-zA-Z0-9_.-]+)[\'"]',
-        r'@([a-zA-Z0-9_-]+)/',
-        r'pip\s+install\s+([a-zA-Z0-9_-]+)',
-        r'npm\s+install\s+([a-zA-Z0-9_-]+)',
-        r'yarn\s+add\s+([a-zA-Z0-9_-]+)'
-    ]
-    
-    for pattern in import_patterns:
-        matches = re.findall(pattern, content)
+    for pattern in _legacy_import_patterns:
+        matches = pattern.findall(content)
         for match in matches:
             if 'aws' in match.lower():
                 clean_name = clean_service_name('AWS SDK')
@@ -250,35 +319,31 @@ def detect_all_services_with_references(folder_path):
     import os
     all_services = defaultdict(lambda: {'count': 0, 'references': []})
     
-    # Skip binary file extensions
-    binary_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.svg', '.webp',
-                        '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm',
-                        '.mp3', '.wav', '.ogg', '.flac', '.aac',
-                        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-                        '.zip', '.tar', '.gz', '.rar', '.7z',
-                        '.exe', '.dll', '.so', '.dylib', '.bin'}
-    
-    for root, _, files in os.walk(folder_path):
+    for root, files in walk_project(folder_path):
         for file in files:
             if file.startswith('.'):
                 continue
                 
-            # Skip binary files
-            _, ext = os.path.splitext(file.lower())
-            if ext in binary_extensions:
-                continue
-                
             full_path = os.path.join(root, file)
             relative_path = os.path.relpath(full_path, folder_path)
             
+            # Skip binary files
+            if is_binary_file(full_path):
+                continue
+            
             try:
                 with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
+                    if looks_minified(content):
+                        continue
                     services = auto_detect_services_with_references(content, relative_path)
                     
                     for service, data in services.items():
-                        all_services[service]['count'] += data['count']
-                        all_services[service]['references'].extend(data['references'])
+                        entry = all_services[service]
+                        entry['count'] += data['count']
+                        room = MAX_REFERENCES_PER_SERVICE - len(entry['references'])
+                        if room > 0:
+                            entry['references'].extend(data['references'][:room])
             except:
                 continue
     
@@ -289,15 +354,19 @@ def detect_all_services(folder_path):
     import os
     all_services = defaultdict(int)
     
-    for root, _, files in os.walk(folder_path):
+    for root, files in walk_project(folder_path):
         for file in files:
             if file.startswith('.'):
                 continue
                 
             full_path = os.path.join(root, file)
+            if is_binary_file(full_path):
+                continue
             try:
                 with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
+                    if looks_minified(content):
+                        continue
                     services = auto_detect_services(content)
                     for service, count in services.items():
                         all_services[service] += count
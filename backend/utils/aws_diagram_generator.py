@@ -41,11 +41,16 @@ class AWSInfrastructureDiagramGenerator:
             }
         }
     
-    def generate_infrastructure_diagram(self, terraform_directory: str, project_name: str = "Project", languages: Dict = None, services: Dict = None) -> Dict[str, Any]:
-        """Generate complete infrastructure diagram from Terraform files or project analysis."""
+    def generate_infrastructure_diagram(self, terraform_directory, project_name: str = "Project", languages: Dict = None, services: Dict = None, terraform_data: Dict = None) -> Dict[str, Any]:
+        """Generate complete infrastructure diagram from Terraform files or project analysis.
+        
+        terraform_directory may be a path or a source_tree object. Pass terraform_data (e.g. RepositoryScan.terraform_data) to reuse an
+        existing parse instead of walking terraform_directory again.
+        """
         
         # First try to parse existing Terraform files
-        terraform_data = self.parser.parse_terraform_directory(terraform_directory)
+        if terraform_data is None:
+            terraform_data = self.parser.parse_terraform_directory(terraform_directory)
         
         if terraform_data['resources']:
             # Use existing Terraform resources
@@ -394,9 +399,13 @@ class AWSInfrastructureDiagramGenerator:
             'Kubernetes': 'eks'
         }
         
+        # Describe every language and unmapped service up front, in as few Bedrock round trips as possible
+        generic_services = {name: count for name, count in services.items() if name not in service_mapping}
+        lang_descriptions, service_descriptions = self.desc_generator.get_descriptions(languages, generic_services)
+        
         # Add detected languages as components
         for lang_name, count in languages.items():
-            recommended.append(self._create_language_component(lang_name, count))
+            recommended.append(self._create_language_component(lang_name, count, lang_descriptions[lang_name]))
         
         # Add services based on actual detections
         for service_name in services.keys():
@@ -406,7 +415,7 @@ class AWSInfrastructureDiagramGenerator:
                 recommended.append(self._create_service(aws_service, f'{aws_service}-service', config))
             else:
                 # Add non-AWS services as-is
-                recommended.append(self._create_generic_service(service_name, services[service_name]))
+                recommended.append(self._create_generic_service(service_name, services[service_name], service_descriptions[service_name]))
         
         # Only add compute if AWS services are detected
         aws_services_detected = any('AWS' in service for service in services.keys())
@@ -449,9 +458,10 @@ class AWSInfrastructureDiagramGenerator:
         }
         return configs.get(aws_service, {'purpose': f'Service for {original_service}'})
     
-    def _create_language_component(self, language: str, count: int) -> Dict[str, Any]:
-        """Create a language component for the diagram."""
-        lang_info = self.desc_generator.get_language_description(language, count)
+    def _create_language_component(self, language: str, count: int, lang_info: Dict = None) -> Dict[str, Any]:
+        """Create a language component for the diagram (fetching its description unless given)."""
+        if lang_info is None:
+            lang_info = self.desc_generator.get_language_description(language, count)
         
         # Merge generated config with file info
         config = lang_info.get('configuration', {})
@@ -473,9 +483,10 @@ class AWSInfrastructureDiagramGenerator:
             'outputs': [{'id': f'lang_{language.lower()}_output', 'label': 'Output'}]
         }
     
-    def _create_generic_service(self, service_name: str, count: int) -> Dict[str, Any]:
-        """Create a generic service component."""
-        service_info = self.desc_generator.get_service_description(service_name, count)
+    def _create_generic_service(self, service_name: str, count: int, service_info: Dict = None) -> Dict[str, Any]:
+        """Create a generic service component (fetching its description unless given)."""
+        if service_info is None:
+            service_info = self.desc_generator.get_service_description(service_name, count)
         
         # Merge generated config with reference info
         config = service_info.get('configuration', {})
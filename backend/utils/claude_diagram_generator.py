@@ -1,7 +1,7 @@
-import boto3
 import json
 import os
 from dotenv import load_dotenv
+from .llm_client import invoke_claude
 
 # Load environment variables
 load_dotenv()
@@ -52,19 +52,7 @@ def generate_architecture_diagram(languages, services, connections, file_structu
     """
     
     try:
-        bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-        
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "messages": [{"role": "user", "content": context}]
-            })
-        )
-        
-        result = json.loads(response['body'].read())
-        diagram_data = json.loads(result['content'][0]['text'])
+        diagram_data = json.loads(invoke_claude(context, max_tokens=2000))
         return diagram_data
         
     except Exception as e:
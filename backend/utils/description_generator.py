@@ -1,15 +1,77 @@
 import os
-import boto3
+import re
 import json
-from typing import Dict, List
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Tuple
+from .llm_client import get_bedrock_client, invoke_claude, mark_degraded, remaining_budget, get_cached, set_cached
+
+# Response budget for one batched description call, and the output tokens one
+# language or service description may take (what a single-item call was given)
+DESCRIPTION_BATCH_MAX_TOKENS = int(os.getenv("INTELLENS_DESCRIPTION_BATCH_MAX_TOKENS", "4000"))
+DESCRIPTION_TOKENS_PER_ITEM = int(os.getenv("INTELLENS_DESCRIPTION_TOKENS_PER_ITEM", "1000"))
+
+# Chunks of one get_descriptions call sent to Bedrock at the same time
+DESCRIPTION_MAX_PARALLEL_CHUNKS = int(os.getenv("INTELLENS_DESCRIPTION_MAX_PARALLEL_CHUNKS", "8"))
+
+# Descriptions being fetched right now: (kind, name) -> Future of the description (or None)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+_json_decoder = json.JSONDecoder()
+_GROUP_START = re.compile(r'"(languages|services)"\s*:\s*\{')
+
+def _extract_json_object(text: str) -> Dict:
+    """Parse a JSON object from model output, tolerating prose around it."""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start:end + 1])
+
+def _skip_space(text: str, pos: int, chars: str = ' \t\r\n') -> int:
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+def _complete_entries(text: str, pos: int) -> Dict:
+    """Read "name": value pairs of the object whose body starts at pos, stopping at the first one cut off."""
+    entries = {}
+    while True:
+        pos = _skip_space(text, pos, ' \t\r\n,')
+        if pos >= len(text) or text[pos] == '}':
+            return entries
+        try:
+            key, pos = _json_decoder.raw_decode(text, pos)
+            pos = _skip_space(text, pos)
+            if not text.startswith(':', pos):
+                return entries
+            value, pos = _json_decoder.raw_decode(text, _skip_space(text, pos + 1))
+        except json.JSONDecodeError:
+            return entries
+        entries[key] = value
+
+def _extract_descriptions(text: str) -> Dict:
+    """Parse a batched description reply; a reply cut off at max_tokens keeps its complete entries."""
+    try:
+        result = _extract_json_object(text)
+        if isinstance(result, dict):
+            return result
+    except json.JSONDecodeError:
+        pass
+    return {match.group(1): _complete_entries(text, match.end()) for match in _GROUP_START.finditer(text)}
 
 class DescriptionGenerator:
     """Generate descriptions for programming languages and services using Bedrock."""
     
     def __init__(self):
-        # Configure Bedrock
+        # Shared Bedrock client
         try:
-            self.client = boto3.client('bedrock-runtime', region_name='us-east-1')
+            self.client = get_bedrock_client()
         except:
             self.client = None
     
@@ -35,30 +97,12 @@ class DescriptionGenerator:
             Keep descriptions concise and practical. Focus on real-world applications.
             """
             
-            response = self.client.invoke_model(
-                modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            response_text = result['content'][0]['text']
+            response_text = invoke_claude(prompt, max_tokens=1000)
             
             # Parse JSON response
             try:
-                result = json.loads(response_text.strip())
-                return {
-                    'description': result['description'],
-                    'use_cases': result['use_cases'],
-                    'characteristics': result['characteristics'],
-                    'configuration': result.get('configuration', {}),
-                    'resource_name': result.get('resource_name', f'{language.lower()}-app'),
-                    'terraform_config': result.get('terraform_config', f'# {language} application configuration')
-                }
-            except (json.JSONDecodeError, KeyError):
+                return self._language_description_from_json(language, json.loads(response_text.strip()))
+            except (json.JSONDecodeError, KeyError, TypeError):
                 return self._get_fallback_language_description(language, file_count)
             
         except Exception as e:
@@ -87,38 +131,195 @@ class DescriptionGenerator:
             Keep descriptions concise and practical. Focus on real-world applications and integration benefits.
             """
             
-            response = self.client.invoke_model(
-                modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 1000,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            response_text = result['content'][0]['text']
+            response_text = invoke_claude(prompt, max_tokens=1000)
             
             # Parse JSON response
             try:
-                result = json.loads(response_text.strip())
-                return {
-                    'description': result['description'],
-                    'use_cases': result['use_cases'],
-                    'integration_benefits': result['integration_benefits'],
-                    'configuration': result.get('configuration', {}),
-                    'resource_name': result.get('resource_name', service.lower().replace(' ', '-')),
-                    'terraform_config': result.get('terraform_config', f'# {service} configuration')
-                }
-            except (json.JSONDecodeError, KeyError):
+                return self._service_description_from_json(service, json.loads(response_text.strip()))
+            except (json.JSONDecodeError, KeyError, TypeError):
                 return self._get_fallback_service_description(service, reference_count)
             
         except Exception as e:
             print(f"Bedrock error for {service}: {e}")
             return self._get_fallback_service_description(service, reference_count)
     
+    def get_descriptions(self, languages: Dict[str, int], services: Dict[str, int]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """Describe every language and service with as few Bedrock calls as possible.
+
+        Descriptions are cached one item at a time, so only the items missing
+        from the cache are asked for, and an item another request is already
+        fetching is waited on (for at most the remaining llm_budget) rather
+        than asked for twice. The misses are sent together in one structured
+        prompt, split into chunks only when the expected response would not
+        fit DESCRIPTION_BATCH_MAX_TOKENS; up to DESCRIPTION_MAX_PARALLEL_CHUNKS
+        chunks are in flight at once.
+        Returns ({language: description}, {service: description}); any item the
+        model leaves out or returns malformed gets its fallback description.
+        """
+        items = [('language', name, count) for name, count in languages.items()]
+        items += [('service', name, count) for name, count in services.items()]
+
+        described = {}
+        misses = []
+        waiting = {}
+        if self.client:
+            for kind, name, count in items:
+                cached = get_cached(self._item_cache_key(kind, name))
+                if cached is not None:
+                    described[(kind, name)] = cached
+                    continue
+                with _in_flight_lock:
+                    future = _in_flight.get((kind, name))
+                    if future is None:
+                        _in_flight[(kind, name)] = Future()
+                        misses.append((kind, name, count))
+                    else:
+                        waiting[(kind, name)] = future
+
+        try:
+            described.update(self._describe_misses(misses))
+        finally:
+            # Hand the results to requests waiting on these items, including None for failures
+            with _in_flight_lock:
+                for kind, name, _ in misses:
+                    _in_flight.pop((kind, name)).set_result(described.get((kind, name)))
+
+        for key, future in waiting.items():
+            # The other request may stall; wait no longer than this caller's latency budget
+            remaining = remaining_budget()
+            try:
+                description = future.result(timeout=None if remaining is None else max(0, remaining))
+            except FutureTimeoutError:
+                mark_degraded()
+                continue
+            if description is not None:
+                described[key] = description
+
+        return self._assemble_descriptions(items, described)
+
+    def _describe_misses(self, misses: List[Tuple[str, str, int]]) -> Dict[Tuple[str, str], Dict]:
+        """Fetch descriptions for items that are not cached, in parallel chunks, and cache each one."""
+        chunks = self._chunk_items(misses)
+        described = {}
+        if len(chunks) <= 1 or DESCRIPTION_MAX_PARALLEL_CHUNKS <= 1:
+            for chunk in chunks:
+                described.update(self._describe_chunk(chunk))
+        else:
+            # Each chunk runs in a copy of the caller's context, so it shares the latency budget and section
+            with ThreadPoolExecutor(max_workers=min(len(chunks), DESCRIPTION_MAX_PARALLEL_CHUNKS)) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, self._describe_chunk, chunk) for chunk in chunks]
+                for future in futures:
+                    described.update(future.result())
+
+        for (kind, name), description in described.items():
+            set_cached(self._item_cache_key(kind, name), description)
+        return described
+
+    def _item_cache_key(self, kind: str, name: str) -> str:
+        return f"description:{kind}:{name}"
+
+    def _chunk_items(self, items: List[Tuple[str, str, int]]) -> List[List[Tuple[str, str, int]]]:
+        """Split (kind, name, count) items into chunks that fit the response token budget."""
+        per_chunk = max(1, DESCRIPTION_BATCH_MAX_TOKENS // DESCRIPTION_TOKENS_PER_ITEM)
+        return [items[i:i + per_chunk] for i in range(0, len(items), per_chunk)]
+
+    def _describe_chunk(self, chunk: List[Tuple[str, str, int]]) -> Dict[Tuple[str, str], Dict]:
+        """Run one batched prompt and return {(kind, name): description} for the items it covered."""
+        if not self.client or not chunk:
+            return {}
+
+        language_names = [name for kind, name, _ in chunk if kind == 'language']
+        service_names = [name for kind, name, _ in chunk if kind == 'service']
+
+        prompt = f"""
+            Provide comprehensive descriptions for the following programming languages and technologies/services.
+
+            Programming languages: {json.dumps(language_names)}
+            Technologies/services: {json.dumps(service_names)}
+
+            Format your response as a single JSON object with exactly this shape, using the names above as keys:
+            {{
+                "languages": {{
+                    "<language>": {{
+                        "description": "Brief 2-3 sentence description of what the language is and its main purpose",
+                        "use_cases": ["use case 1", "use case 2", "use case 3", "use case 4"],
+                        "characteristics": ["key feature 1", "key feature 2", "key feature 3"],
+                        "configuration": {{"key1": "value1", "key2": "value2"}},
+                        "resource_name": "suggested-resource-name",
+                        "terraform_config": "Complete terraform resource block for deploying it"
+                    }}
+                }},
+                "services": {{
+                    "<service>": {{
+                        "description": "Brief 2-3 sentence description of what the service is and its main purpose",
+                        "use_cases": ["use case 1", "use case 2", "use case 3", "use case 4"],
+                        "integration_benefits": ["benefit 1", "benefit 2", "benefit 3"],
+                        "configuration": {{"key1": "value1", "key2": "value2"}},
+                        "resource_name": "suggested-resource-name",
+                        "terraform_config": "Complete terraform resource block for deploying it"
+                    }}
+                }}
+            }}
+
+            Keep descriptions concise and practical. Focus on real-world applications and integration benefits.
+            Return only the JSON object.
+            """
+
+        try:
+            response_text = invoke_claude(prompt, max_tokens=DESCRIPTION_BATCH_MAX_TOKENS)
+        except Exception as e:
+            print(f"Bedrock error for batched descriptions: {e}")
+            return {}
+        result = _extract_descriptions(response_text)
+
+        described = {}
+        for kind, name, _ in chunk:
+            group = result.get('languages' if kind == 'language' else 'services')
+            if not isinstance(group, dict) or name not in group:
+                continue
+            try:
+                if kind == 'language':
+                    described[(kind, name)] = self._language_description_from_json(name, group[name])
+                else:
+                    described[(kind, name)] = self._service_description_from_json(name, group[name])
+            except (KeyError, TypeError, AttributeError):
+                continue
+        return described
+
+    def _assemble_descriptions(self, items, described):
+        """Split described items back into language and service maps, filling gaps with fallbacks."""
+        language_descriptions = {}
+        service_descriptions = {}
+        for kind, name, count in items:
+            if kind == 'language':
+                language_descriptions[name] = described.get((kind, name)) or self._get_fallback_language_description(name, count)
+            else:
+                service_descriptions[name] = described.get((kind, name)) or self._get_fallback_service_description(name, count)
+        return language_descriptions, service_descriptions
+
+    def _language_description_from_json(self, language: str, result: Dict) -> Dict[str, any]:
+        return {
+            'description': result['description'],
+            'use_cases': result['use_cases'],
+            'characteristics': result['characteristics'],
+            'configuration': result.get('configuration', {}),
+            'resource_name': result.get('resource_name', f'{language.lower()}-app'),
+            'terraform_config': result.get('terraform_config', f'# {language} application configuration')
+        }
+
+    def _service_description_from_json(self, service: str, result: Dict) -> Dict[str, any]:
+        return {
+            'description': result['description'],
+            'use_cases': result['use_cases'],
+            'integration_benefits': result['integration_benefits'],
+            'configuration': result.get('configuration', {}),
+            'resource_name': result.get('resource_name', service.lower().replace(' ', '-')),
+            'terraform_config': result.get('terraform_config', f'# {service} configuration')
+        }
+    
     def _get_fallback_language_description(self, language: str, file_count: int) -> Dict[str, any]:
         """Fallback descriptions when Bedrock is unavailable."""
+        mark_degraded()
         fallbacks = {
             'Python': {
                 'description': 'Python is a high-level, interpreted programming language known for its simplicity and readability. It\'s widely used for web development, data science, automation, and artificial intelligence applications.',
@@ -143,6 +344,7 @@ class DescriptionGenerator:
     
     def _get_fallback_service_description(self, service: str, reference_count: int) -> Dict[str, any]:
         """Fallback descriptions for services when Bedrock is unavailable."""
+        mark_degraded()
         fallbacks = {
             'React': {
                 'description': 'React is a JavaScript library for building user interfaces with a component-based architecture. It enables developers to create interactive and dynamic web applications efficiently.',
@@ -0,0 +1,91 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+
+class DiskCache:
+    """Persistent JSON cache stored as one file per key, with size-bounded LRU eviction.
+
+    Entries are written atomically, so several workers can share a directory.
+    Recency is tracked through file modification times, which are bumped on
+    every hit; when the directory grows past max_bytes the least recently
+    used entries are deleted first. With a ttl (seconds), entries also expire
+    that long after they were written.
+    """
+
+    def __init__(self, directory, max_bytes, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if self.ttl is not None and time.time() - entry['created'] > self.ttl:
+                os.remove(path)
+                return None
+            # Mark as recently used
+            os.utime(path, None)
+            return entry['value']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def set(self, key, value):
+        """Store a JSON-serializable value under key and evict if over budget."""
+        path = self._path(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError as e:
+            print(f"Cache write error: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'created': time.time(), 'value': value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Cache write error: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._evict()
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith('.json'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    continue
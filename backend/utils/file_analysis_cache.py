@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+class FileAnalysisCache:
+    """SQLite store of per-file analysis results keyed by blob content hash.
+
+    Rows are keyed by (blob hash, file name, scanner version). The file name is
+    part of the key because extension and name drive language detection; the
+    directory is not, so moved or copied files still hit. Stored results are
+    path-free and get the caller's relative path filled back in on lookup.
+    """
+
+    def __init__(self, path, version, max_entries=500000):
+        self.version = version
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._puts_since_prune = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS file_results ("
+            " blob_hash TEXT NOT NULL,"
+            " file_name TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (blob_hash, file_name, version))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS file_results_last_used ON file_results (last_used)")
+        self._conn.commit()
+
+    def get_many(self, files):
+        """Look up [(relative_path, blob_hash), ...] and return {relative_path: result} for hits."""
+        found = {}
+        if not files:
+            return found
+
+        with self._lock:
+            rows = {}
+            for relative_path, blob_hash in files:
+                row = self._conn.execute(
+                    "SELECT result FROM file_results WHERE blob_hash = ? AND file_name = ? AND version = ?",
+                    (blob_hash, os.path.basename(relative_path), self.version)
+                ).fetchone()
+                if row:
+                    rows[relative_path] = (blob_hash, row[0])
+
+            if rows:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE file_results SET last_used = ? WHERE blob_hash = ? AND file_name = ? AND version = ?",
+                    [(now, blob_hash, os.path.basename(path), self.version) for path, (blob_hash, _) in rows.items()]
+                )
+                self._conn.commit()
+
+        for relative_path, (_, payload) in rows.items():
+            try:
+                found[relative_path] = _restore_result(json.loads(payload), relative_path)
+            except (ValueError, KeyError, TypeError):
+                continue
+        return found
+
+    def put_many(self, entries):
+        """Store [(blob_hash, result), ...] as produced by analyze_file."""
+        now = time.time()
+        rows = [
+            (blob_hash, os.path.basename(result['file']), self.version, json.dumps(_strip_result(result)), now)
+            for blob_hash, result in entries
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_results (blob_hash, file_name, version, result, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._puts_since_prune += len(rows)
+            if self._puts_since_prune >= 1000:
+                self._puts_since_prune = 0
+                self._prune()
+
+    def _prune(self):
+        """Drop rows from other scanner versions and the least recently used overflow."""
+        self._conn.execute("DELETE FROM file_results WHERE version != ?", (self.version,))
+        count = self._conn.execute("SELECT COUNT(*) FROM file_results").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM file_results WHERE rowid IN ("
+                " SELECT rowid FROM file_results ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self._conn.commit()
+
+
+def _strip_result(result):
+    """Remove the relative path from a per-file result so it can be shared across paths."""
+    stripped = dict(result)
+    del stripped['file']
+    stripped['services'] = {
+        service: {
+            'count': data['count'],
+            'references': [{k: v for k, v in ref.items() if k != 'file'} for ref in data['references']]
+        }
+        for service, data in result['services'].items()
+    }
+    return stripped
+
+
+def _restore_result(stored, relative_path):
+    """Rebuild an analyze_file result (tuples included) for relative_path."""
+    stored['file'] = relative_path
+    for data in stored['services'].values():
+        data['references'] = [{'file': relative_path, **ref} for ref in data['references']]
+    stored['connections'] = [tuple(connection) for connection in stored['connections']]
+
+    terraform = stored['terraform']
+    if terraform:
+        terraform['references'] = [tuple(reference) for reference in terraform['references']]
+        if terraform['blocks'] is not None:
+            terraform['blocks'] = tuple(terraform['blocks'])
+    return stored
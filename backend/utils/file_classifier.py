@@ -0,0 +1,87 @@
+import os
+import codecs
+import threading
+from collections import OrderedDict
+
+# Bytes read from the start of a file to decide whether it is text
+SNIFF_BYTES = 8192
+
+# A sample with more than this share of non-text bytes is binary
+MAX_NON_TEXT_RATIO = 0.3
+
+# Verdicts remembered across scans, keyed by file identity (path, size, mtime or CRC)
+VERDICT_CACHE_SIZE = int(os.getenv('INTELLENS_BINARY_VERDICT_CACHE_SIZE', '100000'))
+
+# Control characters that still occur in text files: \b \t \n \f \r and ESC
+_TEXT_CONTROL_BYTES = {8, 9, 10, 12, 13, 27}
+_NON_TEXT_BYTES = bytes(b for b in range(256) if (b < 32 and b not in _TEXT_CONTROL_BYTES) or b == 127)
+
+_verdicts = OrderedDict()
+_verdicts_lock = threading.Lock()
+
+
+def looks_binary(sample):
+    """Decide from the first bytes of a file whether it is binary.
+
+    UTF-16 with a byte order mark is text. Otherwise any NUL byte makes it
+    binary, and so does more than MAX_NON_TEXT_RATIO of control characters
+    or, unless the sample is valid UTF-8, bytes with the high bit set.
+    """
+    if not sample:
+        return False
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return False
+    if b'\0' in sample:
+        return True
+    non_text = len(sample) - len(sample.translate(None, _NON_TEXT_BYTES))
+    try:
+        # The sample may end part-way through a multi-byte character
+        sample.decode('utf-8')
+    except UnicodeDecodeError as e:
+        if e.start < len(sample) - 3:
+            non_text += sum(1 for b in sample if b > 127)
+    return non_text / len(sample) > MAX_NON_TEXT_RATIO
+
+
+def _cached_verdict(key, sniff):
+    with _verdicts_lock:
+        verdict = _verdicts.get(key)
+        if verdict is not None:
+            _verdicts.move_to_end(key)
+            return verdict
+    verdict = looks_binary(sniff())
+    with _verdicts_lock:
+        _verdicts[key] = verdict
+        while len(_verdicts) > VERDICT_CACHE_SIZE:
+            _verdicts.popitem(last=False)
+    return verdict
+
+
+def is_binary_file(path):
+    """True if the file at path is binary. Only the first SNIFF_BYTES are read."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+
+    def sniff():
+        with open(path, 'rb') as f:
+            return f.read(SNIFF_BYTES)
+
+    try:
+        return _cached_verdict(('file', os.path.abspath(path), stat.st_size, stat.st_mtime_ns), sniff)
+    except OSError:
+        return False
+
+
+def is_binary_member(zip_file, info):
+    """True if a zip member is binary. Only the start of the member is decompressed."""
+    def sniff():
+        with zip_file.open(info) as f:
+            return f.read(SNIFF_BYTES)
+
+    try:
+        return _cached_verdict(('zip', info.filename, info.file_size, info.CRC), sniff)
+    except Exception:
+        # Unreadable members are left to the caller's read to report
+        return False
@@ -1,11 +1,21 @@
-def generate_frontend_preview(languages, services, file_details, extract_dir=None):
-    """SAFELY preview uploaded HTML files containing 'index' in their name (e.g., index.html, home_index.html)."""
+def generate_frontend_preview(languages, services, file_details, source=None):
+    """SAFELY preview uploaded HTML files containing 'index' in their name (e.g., index.html, home_index.html).
+
+    source is the uploaded project as a source_tree object (e.g. a ZipSource),
+    or the path of a temporary extract directory.
+    """
     try:
-        import os
         import tempfile
+        from .source_tree import DirectorySource
+
+        if isinstance(source, str):
+            # ✅ SECURITY: Only allow temporary extract directories
+            if not source.startswith(tempfile.gettempdir()):
+                source = None
+            else:
+                source = DirectorySource(source)
 
-        # ✅ SECURITY: Only allow temporary extract directories
-        if not extract_dir or not extract_dir.startswith(tempfile.gettempdir()):
+        if source is None:
             return '<div style="padding: 20px; text-align: center;"><h3>Security Check Failed</h3><p>Only temp directories are allowed for preview.</p></div>'
 
         # ✅ FILTER: Only HTML files that contain the word 'index'
@@ -19,15 +29,9 @@ def generate_frontend_preview(languages, services, file_details, extract_dir=Non
 
         # ✅ Take the first "index" HTML file
         html_file = html_files[0]
-        html_path = os.path.join(extract_dir, html_file['file'])
-
-        # ✅ SECURITY: Prevent directory traversal
-        if not os.path.abspath(html_path).startswith(os.path.abspath(extract_dir)):
-            return '<div style="padding: 20px; text-align: center;"><h3>Security: Path traversal blocked</h3></div>'
 
-        if os.path.exists(html_path):
-            with open(html_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
+        if source.exists(html_file['file']):
+            html_content = source.read_bytes(html_file['file']).decode('utf-8')
 
             # ✅ Render safely within a sandbox-style container
             return f'''
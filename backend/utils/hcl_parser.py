@@ -0,0 +1,372 @@
+import re
+
+class HCLSyntaxError(ValueError):
+    """Raised for input the HCL parser cannot read, with the 1-based line it failed on."""
+
+    def __init__(self, message, line):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class Expression:
+    """A value that is not a plain literal (a reference, function call, operator...), kept as source text."""
+
+    __slots__ = ('source',)
+
+    def __init__(self, source):
+        self.source = source
+
+    def __eq__(self, other):
+        return isinstance(other, Expression) and other.source == self.source
+
+    def __hash__(self):
+        return hash(self.source)
+
+    def __repr__(self):
+        return f"Expression({self.source!r})"
+
+
+class Body:
+    """Attributes ({name: value}) and nested blocks of a file or block."""
+
+    __slots__ = ('attributes', 'blocks')
+
+    def __init__(self, attributes, blocks):
+        self.attributes = attributes
+        self.blocks = blocks
+
+
+class Block:
+    """A block such as resource "aws_s3_bucket" "logs" { ... }."""
+
+    __slots__ = ('type', 'labels', 'body')
+
+    def __init__(self, block_type, labels, body):
+        self.type = block_type
+        self.labels = labels
+        self.body = body
+
+    def __repr__(self):
+        return f"Block({self.type!r}, {self.labels!r})"
+
+
+# One token, after any leading blanks. Strings, block comments and heredocs
+# are only recognized here and scanned by hand.
+_TOKEN = re.compile(r'''[ \t\r]*(?:
+    (?P<newline>\n)
+  | (?P<quote>")
+  | (?P<comment>(?:\#|//)[^\n]*)
+  | (?P<block_comment>/\*)
+  | (?P<heredoc><<(?=-?[A-Za-z_]))
+  | (?P<number>[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<ident>[A-Za-z_][A-Za-z0-9_-]*)
+  | (?P<op>==|!=|<=|>=|&&|\|\||=>|\.\.\.|[-+*/%<>!?:=.,\[\]{}()])
+  | (?P<end>\Z)
+)''', re.X)
+_HEREDOC_START = re.compile(r'<<(-?)([A-Za-z_][A-Za-z0-9_-]*)[ \t]*\r?\n')
+_STRING_CHUNK = re.compile(r'[^"\\$%\n]*')
+_TEMPLATE_CHUNK = re.compile(r'[^{}"]*')
+
+_OPENERS = {'(': ')', '[': ']', '{': '}'}
+_LITERAL_IDENTS = {'true': True, 'false': False, 'null': None}
+
+# Returned by _Parser.primary for values that are not plain literals
+_NOT_LITERAL = object()
+
+
+def _line_at(text, pos):
+    return text.count('\n', 0, pos) + 1
+
+
+def _scan_string(text, pos):
+    """Return the index just past the closing quote of a string whose body starts at pos."""
+    while True:
+        pos = _STRING_CHUNK.match(text, pos).end()
+        if pos >= len(text) or text[pos] == '\n':
+            raise HCLSyntaxError("unterminated string", _line_at(text, pos))
+        ch = text[pos]
+        if ch == '"':
+            return pos + 1
+        if ch == '\\':
+            pos += 2
+        elif text.startswith(ch * 2, pos):
+            # $${ and %%{ are escaped template markers
+            pos += 2
+        elif text.startswith('{', pos + 1):
+            pos = _scan_template(text, pos + 2)
+        else:
+            pos += 1
+
+
+def _scan_template(text, pos):
+    """Return the index just past the } closing a ${ or %{ sequence opened before pos."""
+    depth = 1
+    while True:
+        pos = _TEMPLATE_CHUNK.match(text, pos).end()
+        if pos >= len(text):
+            raise HCLSyntaxError("unterminated template sequence", _line_at(text, pos))
+        ch = text[pos]
+        if ch == '"':
+            pos = _scan_string(text, pos + 1)
+            continue
+        depth += 1 if ch == '{' else -1
+        pos += 1
+        if depth == 0:
+            return pos
+
+
+def _scan_heredoc(text, match):
+    """Return (value, end) for the heredoc whose opening line match covers."""
+    strip_indent, marker = match.group(1), match.group(2)
+    start = pos = match.end()
+    while True:
+        newline = text.find('\n', pos)
+        line_end = len(text) if newline == -1 else newline
+        if text[pos:line_end].strip() == marker:
+            value = text[start:pos]
+            break
+        if newline == -1:
+            raise HCLSyntaxError(f"heredoc {marker} is never closed", _line_at(text, match.start()))
+        pos = newline + 1
+
+    if strip_indent:
+        lines = value.split('\n')
+        indents = [len(line) - len(line.lstrip(' \t')) for line in lines if line.strip()]
+        indent = min(indents) if indents else 0
+        value = '\n'.join(line[indent:] for line in lines)
+    return value, line_end
+
+
+def template_sequences(text):
+    """Yield the source inside each ${...} and %{...} of a string's raw template text."""
+    pos = text.find('{')
+    while pos != -1:
+        if pos > 0 and text[pos - 1] in '$%' and not (pos > 1 and text[pos - 2] == text[pos - 1]):
+            try:
+                end = _scan_template(text, pos + 1)
+            except HCLSyntaxError:
+                # Heredoc content is not checked when tokenizing; take the rest as written
+                end = len(text) + 1
+            yield text[pos + 1:end - 1]
+            pos = end - 1
+        pos = text.find('{', pos + 1)
+
+
+def _tokenize(text):
+    """Yield (kind, value, start, end) tokens; kind is string, number, ident, op, newline or eof.
+
+    Quoted strings come back as their raw template text (escapes and ${...}
+    left as written), heredocs as their content. Comments are dropped, but a
+    block comment spanning lines still ends the line it started on.
+    """
+    pos = 0
+    length = len(text)
+    while True:
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            pos = len(text) - len(text[pos:].lstrip(' \t\r'))
+            raise HCLSyntaxError(f"unexpected character {text[pos]!r}", _line_at(text, pos))
+        kind = match.lastgroup
+        start = match.start(kind)
+        pos = match.end()
+        if kind == 'quote':
+            pos = _scan_string(text, pos)
+            yield ('string', text[start + 1:pos - 1], start, pos)
+        elif kind == 'block_comment':
+            end = text.find('*/', pos)
+            if end == -1:
+                raise HCLSyntaxError("unterminated comment", _line_at(text, start))
+            if text.count('\n', start, end):
+                yield ('newline', '\n', start, end + 2)
+            pos = end + 2
+        elif kind == 'heredoc':
+            heredoc = _HEREDOC_START.match(text, start)
+            if heredoc is None:
+                raise HCLSyntaxError("heredoc marker must end its line", _line_at(text, start))
+            value, pos = _scan_heredoc(text, heredoc)
+            yield ('string', value, start, pos)
+        elif kind == 'end':
+            yield ('eof', None, length, length)
+            return
+        elif kind != 'comment':
+            yield (kind, match.group(kind), start, pos)
+
+
+class _Parser:
+    """Recursive-descent parser over the token stream, one token of lookahead."""
+
+    def __init__(self, text):
+        self.text = text
+        self._tokens = _tokenize(text)
+        self.token = next(self._tokens)
+        self.last_end = 0
+
+    def advance(self):
+        token = self.token
+        if token[0] != 'eof':
+            self.token = next(self._tokens)
+        self.last_end = token[3]
+        return token
+
+    def error(self, message):
+        raise HCLSyntaxError(message, _line_at(self.text, self.token[2]))
+
+    def at_op(self, *values):
+        return self.token[0] == 'op' and self.token[1] in values
+
+    def expect_op(self, value):
+        if not self.at_op(value):
+            self.error(f"expected {value!r}, found {self.token[1]!r}")
+        return self.advance()
+
+    def skip_newlines(self):
+        while self.token[0] == 'newline':
+            self.advance()
+
+    def body(self, nested):
+        attributes = {}
+        blocks = []
+        while True:
+            self.skip_newlines()
+            kind, name = self.token[0], self.token[1]
+            if kind == 'eof' or (kind == 'op' and name == '}'):
+                if nested != (kind == 'op'):
+                    self.error("unexpected end of file" if nested else "unexpected '}'")
+                return Body(attributes, blocks)
+            if kind != 'ident':
+                self.error(f"expected an attribute or block, found {name!r}")
+            self.advance()
+
+            if self.at_op('='):
+                self.advance()
+                attributes[name] = self.expression(stop_on_newline=True, closers=('}',))
+            else:
+                labels = []
+                while self.token[0] in ('string', 'ident'):
+                    labels.append(self.advance()[1])
+                self.expect_op('{')
+                block_body = self.body(nested=True)
+                self.expect_op('}')
+                blocks.append(Block(name, labels, block_body))
+
+            if self.token[0] not in ('newline', 'eof') and not self.at_op('}'):
+                self.error(f"expected a new line after {name!r}, found {self.token[1]!r}")
+
+    def expression(self, stop_on_newline, closers):
+        """Parse a value up to one of closers (or a new line); non-literals become Expression."""
+        start = self.token[2]
+        value = self.primary()
+        if value is not _NOT_LITERAL:
+            if not stop_on_newline:
+                self.skip_newlines()
+            if self.at_end(stop_on_newline, closers):
+                return value
+        self.skip_expression(stop_on_newline, closers)
+        if self.last_end <= start:
+            self.error(f"expected a value, found {self.token[1]!r}")
+        return Expression(self.text[start:self.last_end])
+
+    def at_end(self, stop_on_newline, closers):
+        kind, value = self.token[0], self.token[1]
+        return kind == 'eof' or (kind == 'newline' and stop_on_newline) or (kind == 'op' and value in closers)
+
+    def primary(self):
+        kind, value = self.token[0], self.token[1]
+        if kind == 'string':
+            self.advance()
+            return value
+        if kind == 'number':
+            self.advance()
+            return int(value) if value.isdigit() else float(value)
+        if kind == 'ident' and value in _LITERAL_IDENTS:
+            self.advance()
+            return _LITERAL_IDENTS[value]
+        if kind == 'op' and value == '[':
+            return self.tuple_value()
+        if kind == 'op' and value == '{':
+            return self.object_value()
+        return _NOT_LITERAL
+
+    def tuple_value(self):
+        self.advance()
+        self.skip_newlines()
+        if self.token[0] == 'ident' and self.token[1] == 'for':
+            self.skip_balanced(']')
+            return _NOT_LITERAL
+        items = []
+        while True:
+            self.skip_newlines()
+            if self.at_op(']'):
+                self.advance()
+                return items
+            items.append(self.expression(stop_on_newline=False, closers=(',', ']')))
+            if self.at_op(','):
+                self.advance()
+
+    def object_value(self):
+        self.advance()
+        self.skip_newlines()
+        if self.token[0] == 'ident' and self.token[1] == 'for':
+            self.skip_balanced('}')
+            return _NOT_LITERAL
+        items = {}
+        while True:
+            self.skip_newlines()
+            if self.at_op('}'):
+                self.advance()
+                return items
+            kind, key = self.token[0], self.token[1]
+            if kind in ('string', 'ident', 'number'):
+                self.advance()
+            elif kind == 'op' and key == '(':
+                start = self.token[2]
+                self.advance()
+                self.skip_balanced(')')
+                key = self.text[start:self.last_end]
+            else:
+                self.error(f"expected an object key, found {key!r}")
+            if not self.at_op('=', ':'):
+                self.error(f"expected '=' or ':' after object key {key!r}")
+            self.advance()
+            items[key] = self.expression(stop_on_newline=True, closers=(',', '}'))
+            if self.at_op(','):
+                self.advance()
+
+    def skip_balanced(self, closer):
+        """Consume tokens up to and including closer, the opening bracket having been consumed."""
+        depth = 1
+        while True:
+            kind, value = self.token[0], self.token[1]
+            if kind == 'eof':
+                self.error(f"expected {closer!r} before end of file")
+            self.advance()
+            if kind == 'op':
+                if value in _OPENERS:
+                    depth += 1
+                elif value in (')', ']', '}'):
+                    depth -= 1
+                    if depth == 0:
+                        return
+
+    def skip_expression(self, stop_on_newline, closers):
+        """Consume the rest of an expression, stopping before a closer (or new line) outside brackets."""
+        while not self.at_end(stop_on_newline, closers):
+            kind, value = self.advance()[:2]
+            if kind == 'op' and value in _OPENERS:
+                self.skip_balanced(_OPENERS[value])
+            elif kind == 'op' and value in (')', ']', '}'):
+                self.error(f"unexpected {value!r}")
+
+
+def parse_hcl(text):
+    """Parse HCL source into a Body of attributes and nested blocks.
+
+    Runs in a single left-to-right pass. Literal values (strings, numbers,
+    booleans, null, tuples and objects of literals) are returned as Python
+    values, with quoted strings kept as their raw template text; anything
+    else becomes an Expression holding its source. A leading byte order mark
+    (files saved on Windows) is ignored. Raises HCLSyntaxError.
+    """
+    if text.startswith('\ufeff'):
+        text = text[1:]
+    return _Parser(text).body(nested=False)
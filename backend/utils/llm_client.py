@@ -0,0 +1,335 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import boto3
+from botocore.config import Config
+from .disk_cache import DiskCache
+
+BEDROCK_REGION = os.getenv("INTELLENS_BEDROCK_REGION", "us-east-1")
+BEDROCK_MODEL_ID = os.getenv("INTELLENS_BEDROCK_MODEL_ID", "anthropic.claude-3-sonnet-20240229-v1:0")
+
+# Connection pool and timeouts for the shared client. Keep-alive lets
+# concurrent generators reuse warm TLS connections instead of handshaking
+# per call.
+BEDROCK_MAX_CONNECTIONS = int(os.getenv("INTELLENS_BEDROCK_MAX_CONNECTIONS", "16"))
+BEDROCK_CONNECT_TIMEOUT = float(os.getenv("INTELLENS_BEDROCK_CONNECT_TIMEOUT", "5"))
+BEDROCK_READ_TIMEOUT = float(os.getenv("INTELLENS_BEDROCK_READ_TIMEOUT", "60"))
+BEDROCK_MAX_ATTEMPTS = int(os.getenv("INTELLENS_BEDROCK_MAX_ATTEMPTS", "3"))
+
+# Upper bound on in-flight model calls across the whole process
+BEDROCK_MAX_CONCURRENCY = int(os.getenv("INTELLENS_BEDROCK_MAX_CONCURRENCY", "8"))
+
+# Circuit breaker: open after this many consecutive failed or slow calls, retry after the reset
+LLM_BREAKER_FAILURES = int(os.getenv("INTELLENS_LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_SLOW_SECONDS = float(os.getenv("INTELLENS_LLM_BREAKER_SLOW_SECONDS", "30"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("INTELLENS_LLM_BREAKER_RESET_SECONDS", "60"))
+
+# Responses are cached on disk by model id and normalized prompt, so repeated
+# prompts (a language or service description, say) skip the round trip.
+# Set INTELLENS_LLM_CACHE_DIR to an empty string to turn the cache off. A relative
+# path is taken from backend/, so the cache does not follow the working directory.
+LLM_CACHE_DIR = os.getenv("INTELLENS_LLM_CACHE_DIR", "cache/llm")
+if LLM_CACHE_DIR:
+    LLM_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), LLM_CACHE_DIR)
+LLM_CACHE_MAX_BYTES = int(os.getenv("INTELLENS_LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_TTL = int(os.getenv("INTELLENS_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+_response_cache = DiskCache(LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES, ttl=LLM_CACHE_TTL) if LLM_CACHE_DIR else None
+
+_client = None
+_client_lock = threading.Lock()
+
+# Bedrock requests run on their own pool, which also caps in-flight calls. Callers
+# wait on the returned future, so a spent latency budget frees them even while a
+# slow request is still running.
+_call_executor = ThreadPoolExecutor(max_workers=BEDROCK_MAX_CONCURRENCY, thread_name_prefix="bedrock")
+
+# Streaming calls run on the caller's thread, so they get their own slots
+_stream_slots = threading.BoundedSemaphore(BEDROCK_MAX_CONCURRENCY)
+
+# Single-flight registry: cache key -> Future of the request currently running for it
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling Bedrock when the latency budget is spent or the breaker is open."""
+
+
+class CircuitBreaker:
+    """Stops calling Bedrock after consecutive failures or slow calls.
+
+    After failure_threshold failures in a row (a call slower than
+    slow_call_seconds counts as one), the breaker opens and requests are refused
+    for reset_seconds. Then a single trial request is let through: success
+    closes the breaker, failure opens it again. Every request allow_request
+    lets through must end in record() or, when it never reached Bedrock or
+    was abandoned, release().
+    """
+
+    def __init__(self, failure_threshold, slow_call_seconds, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def allow_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.reset_seconds:
+                return False
+            self._trial_running = True
+            return True
+
+    def record(self, success, elapsed):
+        with self._lock:
+            if success and elapsed <= self.slow_call_seconds:
+                self._failures = 0
+                self._opened_at = None
+                self._trial_running = False
+                return
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"Bedrock circuit breaker opened after {self._failures} failed or slow calls")
+                self._opened_at = time.monotonic()
+                self._trial_running = False
+
+    def release(self):
+        """End a request without a verdict, so a half-open breaker can let the next trial through."""
+        with self._lock:
+            self._trial_running = False
+
+
+_breaker = CircuitBreaker(LLM_BREAKER_FAILURES, LLM_BREAKER_SLOW_SECONDS, LLM_BREAKER_RESET_SECONDS)
+
+# Per-request state. Task runners copy the context into their threads, so
+# every section of one analysis shares the same deadline and degraded set.
+_deadline = ContextVar("llm_deadline", default=None)
+_degraded = ContextVar("llm_degraded", default=None)
+_section = ContextVar("llm_section", default=None)
+
+@contextmanager
+def llm_budget(seconds):
+    """Give LLM calls made in this context a shared deadline of seconds from now.
+
+    Yields the set that collects the names of sections that fell back to
+    deterministic output (see llm_section and mark_degraded).
+    """
+    degraded = set()
+    deadline_token = _deadline.set(time.monotonic() + seconds)
+    degraded_token = _degraded.set(degraded)
+    try:
+        yield degraded
+    finally:
+        _degraded.reset(degraded_token)
+        _deadline.reset(deadline_token)
+
+@contextmanager
+def llm_section(name):
+    """Name the output section that LLM calls in this context belong to."""
+    token = _section.set(name)
+    try:
+        yield
+    finally:
+        _section.reset(token)
+
+def mark_degraded():
+    """Record that the current section used its fallback instead of model output."""
+    degraded = _degraded.get()
+    section = _section.get()
+    if degraded is not None and section:
+        degraded.add(section)
+
+def remaining_budget():
+    """Seconds left in the current llm_budget (negative once spent), or None outside one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+def get_bedrock_client():
+    """Return the process-wide bedrock-runtime client, creating it on first use.
+
+    boto3 clients are thread-safe once built, but building them off the shared
+    default session is not, so construction happens once under a lock.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                config = Config(
+                    region_name=BEDROCK_REGION,
+                    max_pool_connections=BEDROCK_MAX_CONNECTIONS,
+                    tcp_keepalive=True,
+                    connect_timeout=BEDROCK_CONNECT_TIMEOUT,
+                    read_timeout=BEDROCK_READ_TIMEOUT,
+                    retries={"max_attempts": BEDROCK_MAX_ATTEMPTS, "mode": "standard"}
+                )
+                _client = boto3.session.Session().client("bedrock-runtime", config=config)
+    return _client
+
+def _cache_key(prompt, max_tokens):
+    # Prompts are built from indented f-strings; whitespace layout is not meaningful
+    normalized = " ".join(prompt.split())
+    return f"{BEDROCK_MODEL_ID}:{max_tokens}:{normalized}"
+
+def get_cached(key):
+    """Return a value derived from model output (one parsed description, say) from the response cache."""
+    if _response_cache is None:
+        return None
+    return _response_cache.get(f"{BEDROCK_MODEL_ID}:{key}")
+
+def set_cached(key, value):
+    """Store a JSON-serializable value derived from model output next to the cached responses."""
+    if _response_cache is not None:
+        _response_cache.set(f"{BEDROCK_MODEL_ID}:{key}", value)
+
+def _invoke_model(prompt, max_tokens):
+    response = get_bedrock_client().invoke_model(
+        modelId=BEDROCK_MODEL_ID,
+        body=json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        })
+    )
+    result = json.loads(response['body'].read())
+    return result['content'][0]['text']
+
+def _call_and_cache(prompt, max_tokens, cache_key):
+    """Worker body for one Bedrock request: call, feed the breaker, cache the text."""
+    recorded = False
+    try:
+        # A previous request for this key may have finished just before this one was queued
+        if _response_cache is not None:
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        started = time.monotonic()
+        try:
+            text = _invoke_model(prompt, max_tokens)
+        except Exception:
+            recorded = True
+            _breaker.record(False, time.monotonic() - started)
+            raise
+        recorded = True
+        _breaker.record(True, time.monotonic() - started)
+    finally:
+        if not recorded:
+            _breaker.release()
+
+    if _response_cache is not None:
+        _response_cache.set(cache_key, text)
+    return text
+
+def _forget_in_flight(cache_key, future):
+    with _in_flight_lock:
+        if _in_flight.get(cache_key) is future:
+            del _in_flight[cache_key]
+
+def invoke_claude(prompt: str, max_tokens: int) -> str:
+    """Send a single-turn prompt to Claude on Bedrock and return the response text.
+
+    Successful responses are served from the response cache when possible, and
+    concurrent callers with the same prompt share a single in-flight request.
+    Inside llm_budget(), the wait is capped by the remaining budget. Raises
+    LLMUnavailable when the budget is spent or the circuit breaker is open,
+    and passes Bedrock errors on to every waiting caller; callers own the
+    fallback.
+    """
+    cache_key = _cache_key(prompt, max_tokens)
+    if _response_cache is not None:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        raise LLMUnavailable("LLM latency budget exhausted")
+
+    leader = False
+    with _in_flight_lock:
+        future = _in_flight.get(cache_key)
+        if future is None:
+            if not _breaker.allow_request():
+                raise LLMUnavailable("Bedrock circuit breaker is open")
+            future = _call_executor.submit(_call_and_cache, prompt, max_tokens, cache_key)
+            _in_flight[cache_key] = future
+            leader = True
+    if leader:
+        # Registered outside the lock: the callback runs inline if the call already finished
+        future.add_done_callback(lambda done: _forget_in_flight(cache_key, done))
+
+    try:
+        return future.result(timeout=remaining)
+    except FutureTimeoutError:
+        raise LLMUnavailable("LLM latency budget exhausted")
+
+def stream_claude(prompt: str, max_tokens: int):
+    """Yield Claude's response text in chunks as Bedrock streams it.
+
+    Uses invoke_model_with_response_stream, so the first words arrive long
+    before the full answer. Shares the response cache (a cached answer comes
+    back as one chunk) and the circuit breaker with invoke_claude, and holds
+    one of the BEDROCK_MAX_CONCURRENCY call slots while streaming. Raises
+    LLMUnavailable when the llm_budget is already spent or the breaker is
+    open; watching the budget between chunks is up to the caller.
+    """
+    cache_key = _cache_key(prompt, max_tokens)
+    if _response_cache is not None:
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    remaining = remaining_budget()
+    if remaining is not None and remaining <= 0:
+        raise LLMUnavailable("LLM latency budget exhausted")
+
+    if not _breaker.allow_request():
+        raise LLMUnavailable("Bedrock circuit breaker is open")
+
+    parts = []
+    recorded = False
+    started = time.monotonic()
+    try:
+        with _stream_slots:
+            try:
+                response = get_bedrock_client().invoke_model_with_response_stream(
+                    modelId=BEDROCK_MODEL_ID,
+                    body=json.dumps({
+                        "anthropic_version": "bedrock-2023-05-31",
+                        "max_tokens": max_tokens,
+                        "messages": [{"role": "user", "content": prompt}]
+                    })
+                )
+                for event in response['body']:
+                    chunk = event.get('chunk')
+                    if not chunk:
+                        continue
+                    data = json.loads(chunk['bytes'])
+                    if data.get('type') == 'content_block_delta' and data['delta'].get('type') == 'text_delta':
+                        parts.append(data['delta']['text'])
+                        yield data['delta']['text']
+            except Exception:
+                recorded = True
+                _breaker.record(False, time.monotonic() - started)
+                raise
+        recorded = True
+        _breaker.record(True, time.monotonic() - started)
+    finally:
+        # A client that disconnects closes the generator (GeneratorExit) mid-stream
+        if not recorded:
+            _breaker.release()
+
+    if _response_cache is not None:
+        _response_cache.set(cache_key, "".join(parts))
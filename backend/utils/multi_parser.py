@@ -1,5 +1,4 @@
 import os
-import re
 import ast
 import json
 from collections import defaultdict
@@ -15,25 +14,30 @@ LANGUAGE_MAP = {
 
 from .auto_service_detector import detect_all_services, detect_all_services_with_references
 from .auto_language_detector import auto_detect_languages
+from .path_filter import walk_project, looks_minified
+from .file_classifier import is_binary_file
+from .terraform_model import parse_terraform_file
 
 def detect_language_and_services(folder_path):
     """Parse all files and detect languages and services automatically."""
     connections = []
     file_details = []
     
-    for root, _, files in os.walk(folder_path):
+    for root, files in walk_project(folder_path):
         for file in files:
             full_path = os.path.join(root, file)
             relative_path = os.path.relpath(full_path, folder_path)
             ext = os.path.splitext(file)[1].lower()
             
-            # Skip binary/large files
-            if ext in ['.exe', '.bin', '.so', '.dll', '.zip', '.tar', '.gz']:
+            # Skip binary files
+            if is_binary_file(full_path):
                 continue
             
             try:
                 with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
+                if looks_minified(content):
+                    continue
                 
                 # Detect languages for this file
                 from .auto_language_detector import detect_language_from_content, detect_language_from_shebang
@@ -81,57 +85,11 @@ def detect_language_and_services(folder_path):
 
 def detect_language_and_services_with_references(folder_path):
     """Enhanced version that includes service code references."""
-    connections = []
-    file_details = []
+    from .repository_scanner import scan_repository
+    from .reference_table import references_to_dicts
+    scan = scan_repository(folder_path)
     
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            full_path = os.path.join(root, file)
-            relative_path = os.path.relpath(full_path, folder_path)
-            ext = os.path.splitext(file)[1].lower()
-            
-            if ext in ['.exe', '.bin', '.so', '.dll', '.zip', '.tar', '.gz']:
-                continue
-            
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                
-                from .auto_language_detector import detect_language_from_content, detect_language_from_shebang
-                file_languages = []
-                
-                shebang_lang = detect_language_from_shebang(content)
-                if shebang_lang:
-                    file_languages.append(shebang_lang)
-                else:
-                    detected_langs = detect_language_from_content(content, file)
-                    file_languages.extend(detected_langs)
-                    
-                    if not detected_langs and ext in LANGUAGE_MAP:
-                        file_languages.append(LANGUAGE_MAP[ext])
-                
-                from .auto_service_detector import auto_detect_services
-                file_services = auto_detect_services(content)
-                
-                if file_languages or file_services:
-                    file_details.append({
-                        'file': relative_path,
-                        'languages': file_languages,
-                        'services': list(file_services.keys())
-                    })
-                
-                if ext == '.py':
-                    connections.extend(parse_python_imports(content, file))
-                elif ext == '.tf':
-                    connections.extend(parse_terraform_deps(content, file))
-                    
-            except Exception:
-                continue
-    
-    languages = auto_detect_languages(folder_path)
-    services_with_refs = detect_all_services_with_references(folder_path)
-    
-    return languages, services_with_refs, connections, file_details
+    return scan.languages, references_to_dicts(scan.services_with_refs), scan.connections, scan.file_details
 
 def parse_python_imports(content, filename):
     """Extract Python import relationships."""
@@ -151,11 +109,4 @@ def parse_python_imports(content, filename):
 
 def parse_terraform_deps(content, filename):
     """Extract Terraform dependencies."""
-    connections = []
-    depends_pattern = r'depends_on\s*=\s*\[(.*?)\]'
-    matches = re.findall(depends_pattern, content, re.DOTALL)
-    for match in matches:
-        deps = re.findall(r'[\w.]+', match)
-        for dep in deps:
-            connections.append((dep, filename))
-    return connections
\ No newline at end of file
+    return parse_terraform_file(content, filename)['depends_on']
@@ -1,35 +1,26 @@
 import os
-import hcl2
+from .path_filter import walk_project, looks_minified
+from .terraform_model import TerraformModel, parse_terraform_file
+
+def parse_terraform_content(content):
+    """Parse one Terraform file's content and return services + connections."""
+    model = TerraformModel()
+    model.add_file('', parse_terraform_file(content, ''))
+    return model.services, model.connections
 
 def parse_terraform_files(folder_path):
     """Parse Terraform files and return services + connections."""
-    services = set()
-    connections = []
+    model = TerraformModel()
 
-    for root, _, files in os.walk(folder_path):
+    for root, files in walk_project(folder_path):
         for file in files:
             if file.endswith(".tf"):
                 full_path = os.path.join(root, file)
                 with open(full_path, "r") as f:
-                    try:
-                        data = hcl2.load(f)
-                    except Exception:
-                        continue
-
-                    # Parse resources
-                    if "resource" in data:
-                        resource_data = data["resource"]
-                        if isinstance(resource_data, list):
-                            for item in resource_data:
-                                if isinstance(item, dict):
-                                    for resource_type in item.keys():
-                                        services.add(resource_type)
-                        elif isinstance(resource_data, dict):
-                            for resource_type, items in resource_data.items():
-                                for name, config in items.items():
-                                    services.add(resource_type)
-                                    if "depends_on" in config:
-                                        for dep in config["depends_on"]:
-                                            connections.append((dep, resource_type))
+                    content = f.read()
+                if looks_minified(content):
+                    continue
+                relative_path = os.path.relpath(full_path, folder_path).replace(os.sep, '/')
+                model.add_file(relative_path, parse_terraform_file(content, relative_path))
 
-    return list(services), connections
\ No newline at end of file
+    return model.services, model.connections
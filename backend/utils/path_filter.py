@@ -0,0 +1,183 @@
+import os
+import re
+import posixpath
+
+# Files whose patterns are honored in every directory, .gitignore syntax
+IGNORE_FILES = ('.gitignore', '.intellensignore')
+
+# Vendored, generated and tooling paths skipped by default. They are applied
+# before any ignore file, so a project can re-include one with "!build/".
+DEFAULT_IGNORE_PATTERNS = [
+    '.git/', '.hg/', '.svn/',
+    'node_modules/', 'bower_components/', 'jspm_packages/', 'vendor/',
+    'venv/', '.venv/', '__pycache__/', '.tox/', '.nox/', '.mypy_cache/', '.pytest_cache/', '.ruff_cache/',
+    '*.egg-info/', 'site-packages/',
+    'dist/', 'build/', 'out/', '.next/', '.nuxt/', '.svelte-kit/', 'coverage/', '.terraform/', 'target/',
+    '*.min.js', '*.min.css', '*.bundle.js', '*.chunk.js', '*.map',
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'npm-shrinkwrap.json',
+    'poetry.lock', 'Pipfile.lock', 'Cargo.lock', 'composer.lock', 'Gemfile.lock', 'go.sum',
+]
+
+# Minified files: a line longer than this in a file with little whitespace
+MAX_LINE_LENGTH = int(os.getenv('INTELLENS_MAX_LINE_LENGTH', '1000'))
+MIN_WHITESPACE_RATIO = float(os.getenv('INTELLENS_MIN_WHITESPACE_RATIO', '0.08'))
+MINIFIED_MIN_CHARS = 2048
+
+
+def _translate(pattern):
+    """Turn the path part of a .gitignore pattern into a regex body."""
+    parts = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if ch == '*':
+            parts.append('[^/]*')
+        elif ch == '?':
+            parts.append('[^/]')
+        elif ch == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(ch))
+            else:
+                body = pattern[i + 1:end]
+                if body[0] in '!^':
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif ch == '\\' and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(ch))
+        i += 1
+    return ''.join(parts)
+
+
+def parse_ignore_patterns(lines):
+    """Parse .gitignore lines into (regex, negated, dir_only) rules."""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n').rstrip('\r')
+        if not line.strip() or line.startswith('#'):
+            continue
+        line = line.rstrip(' ')
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        # A slash anywhere but the end anchors the pattern to the ignore file's directory
+        anchored = '/' in line
+        body = _translate(line.lstrip('/'))
+        regex = re.compile(('^' if anchored else '^(?:.*/)?') + body + '$')
+        rules.append((regex, negated, dir_only))
+    return rules
+
+
+_default_rules = parse_ignore_patterns(DEFAULT_IGNORE_PATTERNS)
+
+
+class PathFilter:
+    """Decides which project paths to skip, from ignore files and the built-in defaults.
+
+    Paths are relative and '/'-separated. read_text(relative_path) returns an
+    ignore file's text, or None if there is none; ignore files are looked up
+    in each directory the first time a path under it is checked. As in git,
+    the last matching rule wins and deeper ignore files override shallower
+    ones. Callers are expected to skip everything under a skipped directory.
+    """
+
+    def __init__(self, read_text):
+        self.read_text = read_text
+        self._rules = {}
+
+    def _rules_for(self, directory):
+        rules = self._rules.get(directory)
+        if rules is None:
+            rules = list(_default_rules) if directory == '' else []
+            for name in IGNORE_FILES:
+                text = self.read_text(posixpath.join(directory, name) if directory else name)
+                if text:
+                    rules.extend(parse_ignore_patterns(text.splitlines()))
+            self._rules[directory] = rules
+        return rules
+
+    def is_ignored(self, relative_path, is_dir=False):
+        """True if relative_path itself matches an ignore rule (its parents are not checked)."""
+        ignored = False
+        parts = relative_path.split('/')
+        # Walk the ignore files from the root down to the path's own directory
+        for depth in range(len(parts)):
+            directory = '/'.join(parts[:depth])
+            rules = self._rules_for(directory)
+            if not rules:
+                continue
+            path = '/'.join(parts[depth:])
+            for regex, negated, dir_only in rules:
+                if dir_only and not is_dir:
+                    continue
+                if regex.match(path):
+                    ignored = not negated
+        return ignored
+
+
+def _read_text_file(path):
+    try:
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def walk_project(folder_path):
+    """os.walk over a project, pruning ignored directories before descending.
+
+    Yields (root, files) with ignored files already removed.
+    """
+    path_filter = PathFilter(lambda relative_path: _read_text_file(os.path.join(folder_path, relative_path)))
+    for root, dirs, files in os.walk(folder_path):
+        relative_root = os.path.relpath(root, folder_path).replace(os.sep, '/')
+        prefix = '' if relative_root == '.' else relative_root + '/'
+        dirs[:] = [d for d in dirs if not path_filter.is_ignored(prefix + d, is_dir=True)]
+        yield root, [file for file in files if not path_filter.is_ignored(prefix + file)]
+
+
+def filter_paths(relative_paths, read_text):
+    """Drop ignored paths (and everything under ignored directories) from a flat path list."""
+    path_filter = PathFilter(read_text)
+    skipped_dirs = {}
+
+    def dir_skipped(directory):
+        if directory == '':
+            return False
+        skipped = skipped_dirs.get(directory)
+        if skipped is None:
+            parent = posixpath.dirname(directory)
+            skipped = dir_skipped(parent) or path_filter.is_ignored(directory, is_dir=True)
+            skipped_dirs[directory] = skipped
+        return skipped
+
+    return [
+        path for path in relative_paths
+        if not dir_skipped(posixpath.dirname(path)) and not path_filter.is_ignored(path)
+    ]
+
+
+def looks_minified(content):
+    """True for minified or generated text: very long lines with little whitespace."""
+    if len(content) < MINIFIED_MIN_CHARS:
+        return False
+    if max(map(len, content.split('\n'))) <= MAX_LINE_LENGTH:
+        return False
+    whitespace = content.count(' ') + content.count('\t') + content.count('\n')
+    return whitespace / len(content) < MIN_WHITESPACE_RATIO
@@ -1,14 +1,12 @@
-import boto3
-import json
-import os
 from typing import Dict, List
+from .llm_client import get_bedrock_client, invoke_claude, mark_degraded
 
 class ProjectSummaryGenerator:
     """Generate AI-powered project summaries using AWS Bedrock."""
     
     def __init__(self):
         try:
-            self.client = boto3.client('bedrock-runtime', region_name='us-east-1')
+            self.client = get_bedrock_client()
         except:
             self.client = None
     
@@ -38,17 +36,7 @@ class ProjectSummaryGenerator:
             Keep it professional, concise, and insightful. Focus on the technical architecture and business value. Be direct and confident in your assessment.
             """
             
-            response = self.client.invoke_model(
-                modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 500,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            
-            result = json.loads(response['body'].read())
-            return result['content'][0]['text'].strip()
+            return invoke_claude(prompt, max_tokens=500).strip()
             
         except Exception as e:
             print(f"Bedrock error generating project summary: {e}")
@@ -56,6 +44,7 @@ class ProjectSummaryGenerator:
     
     def _get_fallback_summary(self, languages: Dict, services: Dict, project_name: str) -> str:
         """Fallback summary when Bedrock is unavailable."""
+        mark_degraded()
         lang_list = list(languages.keys())
         service_list = list(services.keys())
         total_files = sum(languages.values())
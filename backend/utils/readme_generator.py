@@ -1,8 +1,10 @@
 from dotenv import load_dotenv
 import os
-import boto3
+import re
 import json
+import contextvars
 from .cost_estimator import estimate_costs_for_services
+from .llm_client import invoke_claude, stream_claude, mark_degraded, llm_budget, remaining_budget, LLMUnavailable
 
 # Load .env variables
 load_dotenv()
@@ -10,14 +12,43 @@ load_dotenv()
 def generate_readme(languages, services, file_details, project_name):
     """Generate comprehensive README using AWS Bedrock Claude 3.5."""
     
-    # Generate AI-powered content
-    description, file_explanations, architecture_overview, setup_instructions = generate_bedrock_readme_content(
-        languages, services, file_details, project_name
+    # Generate AI-powered content, falling back to deterministic content when Bedrock is unavailable
+    try:
+        description, file_explanations, architecture_overview, setup_instructions = generate_bedrock_readme_content(
+            languages, services, file_details, project_name
+        )
+    except Exception as e:
+        print(f"README falling back to generated content: {e}")
+        description, file_explanations, architecture_overview, setup_instructions = generate_fallback_content(
+            languages, services, file_details, project_name
+        )
+    
+    static_sections = generate_static_sections(languages, services, file_details)
+    return assemble_readme(
+        project_name, file_details, static_sections,
+        description, file_explanations, architecture_overview, setup_instructions
     )
+
+def generate_static_sections(languages, services, file_details):
+    """Build the README sections that need no model output, in document order."""
     
     # Generate cost estimates
     cost_estimates = estimate_costs_for_services(services)
-
+    
+    features = generate_enhanced_features_section(languages, services, file_details)
+    return {
+        "architecture": "## Architecture\n\n" + generate_architecture_section(languages, services) + "\n\n",
+        "features": f"## Features\n\n{features}\n\n",
+        "tech_stack": generate_tech_stack_section(languages, services),
+        "usage": generate_usage_section(languages, services),
+        "cost_estimation": generate_cost_estimation_section(cost_estimates),
+        "api_documentation": generate_api_documentation(services),
+        "contributing": generate_contributing_section()
+    }
+
+def assemble_readme(project_name, file_details, static_sections, description, file_explanations, architecture_overview, setup_instructions):
+    """Put the AI-written parts and the static sections together into the final README."""
+    
     # Build comprehensive README
     readme = f"# {project_name}\n\n"
     readme += f"{description}\n\n"
@@ -40,15 +71,13 @@ def generate_readme(languages, services, file_details, project_name):
     readme += f"{architecture_overview}\n\n"
     
     # Architecture
-    readme += "## Architecture\n\n"
-    readme += generate_architecture_section(languages, services) + "\n\n"
+    readme += static_sections["architecture"]
     
     # Features
-    features = generate_enhanced_features_section(languages, services, file_details)
-    readme += f"## Features\n\n{features}\n\n"
+    readme += static_sections["features"]
     
     # Tech Stack
-    readme += generate_tech_stack_section(languages, services)
+    readme += static_sections["tech_stack"]
     
     # File Structure
     readme += "## File Structure\n\n"
@@ -58,25 +87,156 @@ def generate_readme(languages, services, file_details, project_name):
     readme += f"## Setup & Installation\n\n{setup_instructions}\n\n"
     
     # Usage
-    readme += generate_usage_section(languages, services)
+    readme += static_sections["usage"]
     
     # Cost Estimation
-    readme += generate_cost_estimation_section(cost_estimates)
+    readme += static_sections["cost_estimation"]
     
     # API Documentation
-    readme += generate_api_documentation(services)
+    readme += static_sections["api_documentation"]
     
     # Contributing
-    readme += generate_contributing_section()
+    readme += static_sections["contributing"]
     
     return readme
 
+def stream_readme_events(languages, services, file_details, project_name, budget_seconds):
+    """Generate a README incrementally for streaming clients.
+    
+    Yields (event, data) pairs: a "section" event for each deterministic
+    section right away, "delta" events with AI-written Markdown as Bedrock
+    streams it, then "done" with the assembled README. The model gets
+    budget_seconds in all; if it fails, runs out of time or leaves parts out,
+    those parts are sent as "section" events from generate_fallback_content
+    and "done" reports degraded=True.
+    """
+    # Starlette advances sync generators in a fresh copy of the context each time,
+    # so the budget's context is kept here and every step runs inside it
+    context = contextvars.copy_context()
+    events = _readme_events(languages, services, file_details, project_name, budget_seconds)
+    try:
+        while True:
+            try:
+                event = context.run(next, events)
+            except StopIteration:
+                return
+            yield event
+    finally:
+        context.run(events.close)
+
+def _readme_events(languages, services, file_details, project_name, budget_seconds):
+    static_sections = generate_static_sections(languages, services, file_details)
+    for name, markdown in static_sections.items():
+        yield "section", {"name": name, "markdown": markdown}
+    yield "section", {
+        "name": "file_structure",
+        "markdown": "## File Structure\n\n" + generate_file_structure_section(file_details, {})
+    }
+    
+    context = prepare_project_context(languages, services, file_details, project_name)
+    streamed = []
+    degraded = False
+    with llm_budget(budget_seconds):
+        stream = stream_claude(build_streaming_readme_prompt(context), max_tokens=2000)
+        try:
+            for text in stream:
+                streamed.append(text)
+                yield "delta", {"text": text}
+                if remaining_budget() <= 0:
+                    raise LLMUnavailable("LLM latency budget exhausted")
+        except Exception as e:
+            print(f"Bedrock streaming error: {e}")
+            degraded = True
+        finally:
+            stream.close()
+    
+    text = "".join(streamed)
+    if degraded:
+        # The section being written when the stream stopped is incomplete
+        text = text[:max(text.rfind("\n## "), 0)]
+    description, file_explanations, architecture_overview, setup_instructions = parse_streamed_readme_content(text)
+    if not (description and file_explanations and architecture_overview and setup_instructions):
+        degraded = True
+        fallback = generate_fallback_content(languages, services, file_details, project_name)
+        if not description:
+            description = fallback[0]
+            yield "section", {"name": "description", "markdown": description}
+        if not architecture_overview:
+            architecture_overview = fallback[2]
+            yield "section", {"name": "overview", "markdown": f"## Overview\n\n{architecture_overview}\n\n"}
+        if not setup_instructions:
+            setup_instructions = fallback[3]
+            yield "section", {"name": "setup", "markdown": f"## Setup & Installation\n\n{setup_instructions}\n\n"}
+        if not file_explanations:
+            file_explanations = fallback[1]
+            yield "section", {
+                "name": "file_structure",
+                "markdown": "## File Structure\n\n" + generate_file_structure_section(file_details, file_explanations)
+            }
+    
+    readme = assemble_readme(
+        project_name, file_details, static_sections,
+        description, file_explanations, architecture_overview, setup_instructions
+    )
+    yield "done", {"readme": readme, "degraded": degraded}
+
+def build_streaming_readme_prompt(context):
+    """Prompt for README content as plain Markdown, which reads well while it streams."""
+    return f"""
+You are a senior technical writer creating a comprehensive README for a software project. 
+
+Project Analysis:
+{context}
+
+Write these sections in Markdown, using exactly these level-2 headings in this order:
+
+## Description
+2-3 sentences explaining what the project does.
+
+## Architecture Overview
+How the components interact.
+
+## Setup & Installation
+Detailed setup instructions.
+
+## Key Files
+One bullet per major file, formatted as: - `path/to/file`: explanation
+
+Write in professional GitHub README style with clear, concise explanations. Do not add other headings.
+"""
+
+def parse_streamed_readme_content(text):
+    """Split streamed Markdown back into (description, file_explanations, architecture_overview, setup_instructions)."""
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        heading = re.match(r'^##\s+(.+?)\s*$', line)
+        if heading:
+            current = heading.group(1).lower()
+            sections[current] = []
+        elif current:
+            sections[current].append(line)
+    
+    def section_text(name):
+        return "\n".join(sections.get(name, [])).strip()
+    
+    file_explanations = {}
+    for line in sections.get('key files', []):
+        entry = re.match(r'^\s*[-*]\s+\**`([^`]+)`\**\s*[:\-]\s*(.+)$', line)
+        if entry:
+            file_explanations[entry.group(1)] = entry.group(2).strip()
+    
+    return (
+        section_text('description'),
+        file_explanations,
+        section_text('architecture overview'),
+        section_text('setup & installation')
+    )
+
 def generate_bedrock_readme_content(languages, services, file_details, project_name):
     """Use AWS Bedrock Claude 3.5 to generate comprehensive README content."""
     
     # Force Bedrock usage only
-    bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
-
     try:
         # Prepare context
         context = prepare_project_context(languages, services, file_details, project_name)
@@ -98,17 +258,7 @@ Write in professional GitHub README style with clear, concise explanations.
 Return as JSON with keys: description, architecture_overview, setup_instructions, file_explanations
 """
         
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2000,
-                "messages": [{"role": "user", "content": prompt}]
-            })
-        )
-        
-        result = json.loads(response['body'].read())
-        response_text = result['content'][0]['text']
+        response_text = invoke_claude(prompt, max_tokens=2000)
         
         # Try to extract JSON from response text
         try:
@@ -153,6 +303,7 @@ def prepare_project_context(languages, services, file_details, project_name):
 
 def generate_fallback_content(languages, services, file_details, project_name):
     """Enhanced fallback content when AI is unavailable."""
+    mark_degraded()
     description = f"**{project_name}** is a {', '.join(languages.keys())} application that integrates with {len(services)} services including {', '.join(list(services.keys())[:3])}."
     
     file_explanations = {}
@@ -0,0 +1,169 @@
+from array import array
+
+class ReferencePool:
+    """File paths and code text shared by the reference tables of one scan.
+
+    Each file path is stored once and referred to by its index in files.
+    Code excerpts are appended to a single text buffer, once per distinct
+    (file, line, excerpt), and references keep offsets into it.
+    """
+
+    def __init__(self, files=None, text=""):
+        self.files = list(files or [])
+        self._file_ids = {path: index for index, path in enumerate(self.files)}
+        self._text = text
+        self._chunks = []
+        self._size = len(text)
+        self._lines = {}
+        self._lines_file = None
+
+    def file_id(self, path):
+        file_id = self._file_ids.get(path)
+        if file_id is None:
+            file_id = len(self.files)
+            self.files.append(path)
+            self._file_ids[path] = file_id
+        return file_id
+
+    def add_text(self, text):
+        """Append text to the buffer and return its offset."""
+        offset = self._size
+        self._chunks.append(text)
+        self._size += len(text)
+        return offset
+
+    def add_line(self, file_id, line, code):
+        """Return the buffer offset of code, adding it unless this line excerpt is already there."""
+        # A file's references arrive together, so the index only covers the current file
+        if file_id != self._lines_file:
+            self._lines = {}
+            self._lines_file = file_id
+        key = (line, code)
+        offset = self._lines.get(key)
+        if offset is None:
+            offset = self._lines[key] = self.add_text(code)
+        return offset
+
+    @property
+    def text(self):
+        if self._chunks:
+            self._text += "".join(self._chunks)
+            self._chunks = []
+        return self._text
+
+    def compact(self):
+        """Drop the build-time line index once no more references will be added."""
+        self._lines = {}
+        self._lines_file = None
+        return self.text
+
+
+class ReferenceTable:
+    """One service's code references, stored column-wise.
+
+    Each reference is a file id, a line number and (offset, length) pairs
+    for its code excerpt and matched text in the pool's text buffer.
+    to_dicts turns a slice back into the {'file', 'line', 'code', 'match'}
+    dicts the API returns.
+    """
+
+    COLUMNS = ("file_ids", "lines", "code_offsets", "code_lengths", "match_offsets", "match_lengths")
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.file_ids = array("i")
+        self.lines = array("i")
+        self.code_offsets = array("q")
+        self.code_lengths = array("i")
+        self.match_offsets = array("q")
+        self.match_lengths = array("i")
+
+    def __len__(self):
+        return len(self.file_ids)
+
+    def append(self, reference):
+        """Add a reference given as a {'file', 'line', 'code', 'match'} dict."""
+        pool = self.pool
+        file_id = pool.file_id(reference["file"])
+        code, match = reference["code"], reference["match"]
+        code_offset = pool.add_line(file_id, reference["line"], code)
+        position = code.find(match)
+        # A match cut off by the excerpt window is kept as separate text
+        match_offset = code_offset + position if position >= 0 else pool.add_text(match)
+
+        self.file_ids.append(file_id)
+        self.lines.append(reference["line"])
+        self.code_offsets.append(code_offset)
+        self.code_lengths.append(len(code))
+        self.match_offsets.append(match_offset)
+        self.match_lengths.append(len(match))
+
+    def to_dicts(self, start=0, stop=None):
+        """Return references[start:stop] in the API's dict shape."""
+        text = self.pool.text
+        files = self.pool.files
+        references = []
+        for i in range(*slice(start, stop).indices(len(self))):
+            code_offset = self.code_offsets[i]
+            match_offset = self.match_offsets[i]
+            references.append({
+                "file": files[self.file_ids[i]],
+                "line": self.lines[i],
+                "code": text[code_offset:code_offset + self.code_lengths[i]],
+                "match": text[match_offset:match_offset + self.match_lengths[i]]
+            })
+        return references
+
+
+def references_to_dicts(services_with_refs, limit=None):
+    """Serialize {service: {'count', 'references': ReferenceTable}} to the API's dict shape.
+
+    With limit, each service keeps only its first limit references.
+    """
+    return {
+        service: {"count": data["count"], "references": data["references"].to_dicts(0, limit)}
+        for service, data in services_with_refs.items()
+    }
+
+
+def references_from_dicts(services_with_refs):
+    """Build columnar references from the API's dict shape."""
+    pool = ReferencePool()
+    columnar = {}
+    for service, data in services_with_refs.items():
+        table = ReferenceTable(pool)
+        for reference in data["references"]:
+            table.append(reference)
+        columnar[service] = {"count": data["count"], "references": table}
+    pool.compact()
+    return columnar
+
+
+def dump_references(services_with_refs):
+    """Return a JSON-serializable form of columnar references (sharing one pool)."""
+    pool = None
+    services = {}
+    for service, data in services_with_refs.items():
+        table = data["references"]
+        pool = table.pool
+        services[service] = {
+            "count": data["count"],
+            **{column: getattr(table, column).tolist() for column in ReferenceTable.COLUMNS}
+        }
+    return {
+        "files": pool.files if pool else [],
+        "text": pool.text if pool else "",
+        "services": services
+    }
+
+
+def load_references(dumped):
+    """Inverse of dump_references."""
+    pool = ReferencePool(dumped["files"], dumped["text"])
+    columnar = {}
+    for service, data in dumped["services"].items():
+        table = ReferenceTable(pool)
+        for column in ReferenceTable.COLUMNS:
+            getattr(table, column).fromlist(data[column])
+        columnar[service] = {"count": data["count"], "references": table}
+    return columnar
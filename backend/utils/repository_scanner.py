@@ -0,0 +1,308 @@
+import os
+import codecs
+import hashlib
+import multiprocessing
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .auto_language_detector import detect_language_from_content, detect_language_from_shebang
+from .auto_service_detector import auto_detect_services, auto_detect_services_with_references, MAX_REFERENCES_PER_SERVICE
+from .multi_parser import LANGUAGE_MAP, parse_python_imports
+from .terraform_model import TerraformModel, parse_terraform_file
+from .source_tree import as_source
+from .path_filter import looks_minified
+from .reference_table import ReferencePool, ReferenceTable
+
+# Bump when analyze_file output changes so cached per-file results are not reused
+SCAN_VERSION = "7"
+
+# Process-pool scanning (workers <= 1 keeps the scan in-process)
+SCAN_WORKERS = int(os.getenv('INTELLENS_SCAN_WORKERS', '1'))
+SCAN_BATCH_SIZE = int(os.getenv('INTELLENS_SCAN_BATCH_SIZE', '64'))
+SCAN_BATCH_BYTES = int(os.getenv('INTELLENS_SCAN_BATCH_BYTES', str(4 * 1024 * 1024)))
+
+_process_pool = None
+_process_pool_workers = 0
+_process_pool_lock = threading.Lock()
+
+
+class RepositoryScan:
+    """Aggregated results of one pass over a project tree."""
+
+    def __init__(self):
+        self.languages = defaultdict(int)
+        # Code references are kept column-wise in tables sharing one pool of paths and text
+        self.reference_pool = ReferencePool()
+        self.services_with_refs = defaultdict(lambda: {'count': 0, 'references': ReferenceTable(self.reference_pool)})
+        self.connections = []
+        self.file_details = []
+        self.terraform = TerraformModel()
+        self.tf_services = []
+        self.tf_connections = []
+
+    def add_file_result(self, result):
+        """Merge the output of analyze_file into the aggregate structures."""
+        if result['language']:
+            self.languages[result['language']] += 1
+
+        for service, data in result['services'].items():
+            entry = self.services_with_refs[service]
+            entry['count'] += data['count']
+            room = MAX_REFERENCES_PER_SERVICE - len(entry['references'])
+            for reference in data['references'][:max(room, 0)]:
+                entry['references'].append(reference)
+
+        if result['file_languages'] is not None:
+            if result['file_languages'] or result['file_services']:
+                self.file_details.append({
+                    'file': result['file'],
+                    'languages': result['file_languages'],
+                    'services': result['file_services']
+                })
+            self.connections.extend(result['connections'])
+
+        if result['terraform']:
+            self.terraform.add_file(result['file'], result['terraform'])
+
+    def finalize(self):
+        """Convert the accumulators into the plain structures the API returns."""
+        self.languages = dict(self.languages)
+        self.services_with_refs = dict(self.services_with_refs)
+        self.reference_pool.compact()
+        self.tf_services = self.terraform.services
+        self.tf_connections = self.terraform.connections
+        return self
+
+    @property
+    def terraform_data(self):
+        """Parsed Terraform resources, variables and outputs for the whole tree."""
+        return self.terraform.terraform_data
+
+
+def analyze_file(relative_path, content):
+    """Run every per-file detector over one file's content.
+
+    content is always text: binary files are dropped before they are decoded
+    (see file_classifier). Each detector keeps the dotfile rules it had when it
+    walked the tree on its own, so the merged results match the legacy walkers.
+    """
+    file = os.path.basename(relative_path)
+    ext = os.path.splitext(file)[1].lower()
+    is_dotfile = file.startswith('.')
+
+    result = {
+        'file': relative_path,
+        'language': None,
+        'file_languages': None,
+        'file_services': None,
+        'services': {},
+        'connections': [],
+        'terraform': None
+    }
+
+    # Language detection (shebang first, then content patterns)
+    shebang_lang = detect_language_from_shebang(content)
+    detected_langs = [] if shebang_lang else detect_language_from_content(content, file)
+    if not is_dotfile:
+        result['language'] = shebang_lang or (detected_langs[0] if detected_langs else None)
+
+    # Per-file details and connections
+    if shebang_lang:
+        file_languages = [shebang_lang]
+    else:
+        file_languages = list(detected_langs)
+        if not detected_langs and ext in LANGUAGE_MAP:
+            file_languages.append(LANGUAGE_MAP[ext])
+
+    result['file_languages'] = file_languages
+    result['file_services'] = list(auto_detect_services(content).keys())
+
+    # Terraform files are parsed once, for the depends_on edges here and the Terraform model below
+    terraform = parse_terraform_file(content, relative_path) if file.endswith('.tf') else None
+
+    if ext == '.py':
+        result['connections'] = parse_python_imports(content, file)
+    elif terraform:
+        result['connections'] = [(address, file) for address, _ in terraform['depends_on']]
+
+    # Service references
+    if not is_dotfile:
+        result['services'] = auto_detect_services_with_references(content, relative_path)
+
+    # Terraform services, connections and blocks
+    if terraform:
+        result['terraform'] = {
+            'services': terraform['services'],
+            'addresses': terraform['addresses'],
+            'references': terraform['references'],
+            'module_sources': terraform['module_sources'],
+            'blocks': terraform['blocks']
+        }
+
+    return result
+
+
+def _analyze_safely(relative_path, content):
+    """analyze_file, or None when a detector fails on this file so the rest of the scan goes on."""
+    try:
+        return analyze_file(relative_path, content)
+    except Exception as e:
+        print(f"Error analyzing {relative_path}: {e!r}")
+        return None
+
+
+def _analyze_batch(batch):
+    """Process-pool entry point: analyze a chunk of (relative_path, content) pairs.
+
+    Files that could not be analyzed come back as None.
+    """
+    return [_analyze_safely(relative_path, content) for relative_path, content in batch]
+
+
+def _decode(raw):
+    """Decode file bytes exactly as text-mode open(errors='ignore') would, or as UTF-16 when they start with its BOM."""
+    if raw.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        content = raw.decode('utf-16', errors='ignore')
+    else:
+        content = raw.decode('utf-8', errors='ignore')
+    if '\r' in content:
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+    return content
+
+
+def _iter_file_contents(source, with_hash=False):
+    """Yield (relative_path, content, blob_hash) for every readable text file in source that is not minified.
+
+    blob_hash is the SHA-1 of the raw bytes when with_hash is set, else None.
+    """
+    for relative_path in source.iter_files():
+        try:
+            # Sniffed from the first few KB, so binary files are never read in full
+            if source.is_binary(relative_path):
+                continue
+            raw = source.read_bytes(relative_path)
+        except Exception:
+            continue
+
+        content = _decode(raw)
+        # Minified bundles and other generated text only add noise (and reference volume)
+        if looks_minified(content):
+            continue
+        blob_hash = hashlib.sha1(raw).hexdigest() if with_hash else None
+        yield relative_path, content, blob_hash
+
+
+def _iter_batches(file_contents, batch_size, batch_bytes):
+    """Group files into batches bounded by file count and total characters."""
+    batch = []
+    size = 0
+    for item in file_contents:
+        batch.append(item)
+        size += len(item[1])
+        if len(batch) >= batch_size or size >= batch_bytes:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+
+def _get_process_pool(workers):
+    """Return the shared scan pool, (re)creating it when the size changes."""
+    global _process_pool, _process_pool_workers
+    with _process_pool_lock:
+        if _process_pool is None or _process_pool_workers != workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            # spawn avoids forking the server's threads into the workers
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _process_pool_workers = workers
+        return _process_pool
+
+
+def _reset_process_pool():
+    """Drop a broken pool so the next scan starts fresh workers."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False)
+        _process_pool = None
+
+
+def _scan_batches(scan, batches, executor, workers, cache):
+    """Analyze batches (in the pool when given one) and merge them back in walk order.
+
+    Files whose blob is already in the cache are not analyzed again; fresh
+    results are written back to the cache once their batch completes.
+    """
+    pending = deque()
+
+    def merge(batch, cached, results):
+        fresh = iter(results)
+        new_rows = []
+        for relative_path, _, blob_hash in batch:
+            result = cached.get(relative_path)
+            if result is None:
+                result = next(fresh)
+                if result is None:
+                    continue
+                if cache is not None:
+                    new_rows.append((blob_hash, result))
+            scan.add_file_result(result)
+        if new_rows:
+            cache.put_many(new_rows)
+
+    for batch in batches:
+        cached = cache.get_many([(path, blob_hash) for path, _, blob_hash in batch]) if cache is not None else {}
+        misses = [(path, content) for path, content, _ in batch if path not in cached]
+
+        if executor is None:
+            merge(batch, cached, _analyze_batch(misses))
+            continue
+
+        future = executor.submit(_analyze_batch, misses) if misses else None
+        pending.append((batch, cached, future))
+        # Bound in-flight batches so memory follows the pool size, not the tree size
+        while len(pending) >= workers * 2:
+            batch, cached, future = pending.popleft()
+            merge(batch, cached, future.result() if future else [])
+
+    while pending:
+        batch, cached, future = pending.popleft()
+        merge(batch, cached, future.result() if future else [])
+
+
+def scan_repository(source, workers=None, batch_size=None, cache=None):
+    """Walk the project tree once and feed every detector from the same read.
+
+    source is a directory path or a source_tree object (e.g. a ZipSource
+    reading members straight from the uploaded archive). With workers > 1
+    the per-file analysis runs in a process pool on batches of batch_size
+    files; results are merged in the same order as a serial scan. With a
+    FileAnalysisCache only new or changed blobs are analyzed.
+    """
+    workers = SCAN_WORKERS if workers is None else workers
+    batch_size = batch_size or SCAN_BATCH_SIZE
+    source = as_source(source)
+
+    def batches():
+        return _iter_batches(_iter_file_contents(source, with_hash=cache is not None),
+                             batch_size, SCAN_BATCH_BYTES)
+
+    if workers > 1:
+        scan = RepositoryScan()
+        try:
+            _scan_batches(scan, batches(), _get_process_pool(workers), workers, cache)
+            return scan.finalize()
+        except BrokenProcessPool as e:
+            print(f"Scan worker pool failed, rescanning in-process: {e}")
+            _reset_process_pool()
+
+    scan = RepositoryScan()
+    _scan_batches(scan, batches(), None, 1, cache)
+    return scan.finalize()
@@ -0,0 +1,86 @@
+import os
+import posixpath
+from .path_filter import walk_project, filter_paths
+from .file_classifier import is_binary_file, is_binary_member
+
+class DirectorySource:
+    """Project files read from a directory on disk."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def iter_files(self):
+        """Yield the relative path of every file not ignored (see path_filter), in os.walk order."""
+        for root, files in walk_project(self.root):
+            for file in files:
+                yield os.path.relpath(os.path.join(root, file), self.root)
+
+    def _full_path(self, relative_path):
+        full_path = os.path.abspath(os.path.join(self.root, relative_path))
+        # ✅ SECURITY: Prevent directory traversal
+        if not full_path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"Path escapes project root: {relative_path}")
+        return full_path
+
+    def exists(self, relative_path):
+        try:
+            return os.path.isfile(self._full_path(relative_path))
+        except ValueError:
+            return False
+
+    def is_binary(self, relative_path):
+        return is_binary_file(self._full_path(relative_path))
+
+    def read_bytes(self, relative_path):
+        with open(self._full_path(relative_path), 'rb') as f:
+            return f.read()
+
+
+class ZipSource:
+    """Project files streamed straight from an open ZipFile, without extracting to disk.
+
+    Member names are normalized the way extraction would lay them out;
+    absolute names and names that climb out of the archive root are ignored.
+    """
+
+    def __init__(self, zip_file):
+        self.zip_file = zip_file
+        self._members = {}
+        for info in zip_file.infolist():
+            if info.is_dir():
+                continue
+            name = posixpath.normpath(info.filename)
+            if name.startswith('/') or name == '..' or name.startswith('../'):
+                continue
+            # Later duplicates overwrite earlier ones, as extractall would
+            self._members[name] = info
+
+    def iter_files(self):
+        """Yield the relative path of every file member not ignored (see path_filter), in archive order."""
+        return iter(filter_paths(list(self._members), self._read_ignore_file))
+
+    def _read_ignore_file(self, relative_path):
+        info = self._members.get(relative_path)
+        if info is None:
+            return None
+        return self.zip_file.read(info).decode('utf-8', errors='ignore')
+
+    def exists(self, relative_path):
+        return posixpath.normpath(relative_path) in self._members
+
+    def is_binary(self, relative_path):
+        info = self._members.get(posixpath.normpath(relative_path))
+        return info is not None and is_binary_member(self.zip_file, info)
+
+    def read_bytes(self, relative_path):
+        info = self._members.get(posixpath.normpath(relative_path))
+        if info is None:
+            raise ValueError(f"No such archive member: {relative_path}")
+        return self.zip_file.read(info)
+
+
+def as_source(source):
+    """Accept a directory path or a source object and return a source object."""
+    if isinstance(source, str):
+        return DirectorySource(source)
+    return source
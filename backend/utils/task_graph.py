@@ -0,0 +1,56 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+def run_task_graph(tasks, max_workers=8, progress=None):
+    """Run a dependency graph of callables on a thread pool and return {name: result}.
+
+    tasks maps a name to (func, deps). func is called with the results of its
+    deps as keyword arguments, as soon as all of them are available, so
+    independent branches overlap and total time is the slowest chain. progress,
+    if given, is called as progress(name, status) with "running" and "done".
+    Each task runs in a copy of the caller's context, so context variables
+    (such as the LLM latency budget) carry over into the worker threads.
+    The first task error is re-raised once in-flight tasks have finished; no
+    new tasks are started after a failure.
+    """
+    for name, (_, deps) in tasks.items():
+        for dep in deps:
+            if dep not in tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dep}")
+
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    error = None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            if error is None:
+                ready = [name for name, (_, deps) in pending.items() if all(dep in results for dep in deps)]
+                for name in ready:
+                    func, deps = pending.pop(name)
+                    if progress:
+                        progress(name, "running")
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, func, **{dep: results[dep] for dep in deps})] = name
+
+            if not running:
+                if error is None and pending:
+                    raise ValueError(f"Task graph has a dependency cycle: {sorted(pending)}")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    if error is None:
+                        error = e
+                    continue
+                if progress:
+                    progress(name, "done")
+
+    if error is not None:
+        raise error
+    return results
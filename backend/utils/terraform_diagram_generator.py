@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import json
+from .llm_client import mark_degraded
 
 def generate_terraform_diagram(languages, services, project_name="Project"):
     """Generate Terraform configuration and AWS architecture diagram based on uploaded project."""
@@ -248,10 +249,8 @@ def _generate_terraform_config(services, project_name):
 def generate_service_connections(services, detected_services):
     """Use Bedrock to generate intelligent service connections."""
     try:
-        import boto3
         import json
-        
-        bedrock = boto3.client('bedrock-runtime', region_name='us-east-1')
+        from .llm_client import invoke_claude
         
         service_list = [f"{s['name']} ({s['id']})" for s in services]
         
@@ -279,17 +278,7 @@ Rules:
 - Use logical flow patterns
 """
         
-        response = bedrock.invoke_model(
-            modelId='anthropic.claude-3-sonnet-20240229-v1:0',
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 1000,
-                "messages": [{"role": "user", "content": prompt}]
-            })
-        )
-        
-        result = json.loads(response['body'].read())
-        response_text = result['content'][0]['text']
+        response_text = invoke_claude(prompt, max_tokens=1000)
         
         # Extract JSON from response
         import re
@@ -306,6 +295,7 @@ Rules:
 
 def generate_fallback_connections(services):
     """Generate basic service connections as fallback."""
+    mark_degraded()
     connections = []
     service_ids = [s['id'] for s in services]
     
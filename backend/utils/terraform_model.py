@@ -0,0 +1,262 @@
+import re
+import posixpath
+from .hcl_parser import parse_hcl, template_sequences, Expression, HCLSyntaxError
+from .terraform_parser import TerraformParser
+
+_terraform_parser = TerraformParser()
+
+# A resource address inside a depends_on entry, e.g. aws_s3_bucket.logs or module.network
+_ADDRESS = re.compile(r'[A-Za-z_][\w-]*(?:\.[A-Za-z_][\w-]*)+')
+
+# A possible reference inside an expression: aws_s3_bucket.logs(.arn), data.aws_ami.ubuntu(.id),
+# module.vpc(.subnet_ids). Candidates that name nothing declared (var.x, each.value...) are dropped
+# when they are resolved against the project's address index.
+_REFERENCE = re.compile(r'(?<![\w.])(?:data\.)?[A-Za-z_][\w-]*\.[A-Za-z_][\w-]*')
+
+
+def _depends_on_addresses(value):
+    """Return the addresses listed in a depends_on value ([aws_s3_bucket.logs, "module.vpc"], ...)."""
+    items = value if isinstance(value, list) else [value]
+    addresses = []
+    for item in items:
+        text = item.source if isinstance(item, Expression) else str(item)
+        addresses.extend(_ADDRESS.findall(text))
+    return addresses
+
+
+def _block_address(block):
+    """The address other blocks refer to this one by, or None for blocks that cannot be referenced."""
+    if block.type == 'resource' and len(block.labels) == 2:
+        return '.'.join(block.labels)
+    if block.type == 'data' and len(block.labels) == 2:
+        return 'data.' + '.'.join(block.labels)
+    if block.type == 'module' and len(block.labels) == 1:
+        return 'module.' + block.labels[0]
+    return None
+
+
+def _value_references(value, found):
+    """Add the reference candidates in a parsed attribute value to found (a dict used as an ordered set)."""
+    if isinstance(value, Expression):
+        found.update(dict.fromkeys(_REFERENCE.findall(value.source)))
+    elif isinstance(value, str):
+        if '{' in value:
+            for sequence in template_sequences(value):
+                found.update(dict.fromkeys(_REFERENCE.findall(sequence)))
+    elif isinstance(value, list):
+        for item in value:
+            _value_references(item, found)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _value_references(item, found)
+
+
+def _body_references(body, found):
+    for value in body.attributes.values():
+        _value_references(value, found)
+    for block in body.blocks:
+        _body_references(block.body, found)
+
+
+def parse_terraform_file(content, filename):
+    """Parse one .tf file once and return everything the Terraform pipelines use from it.
+
+    filename is the file's path relative to the project root, as every entry
+    point (the repository scanner, parse_terraform_files, TerraformParser)
+    passes it. Returns a JSON-serializable dict:
+      services    resource types declared in the file, in order
+      addresses   {address: resource type} for the file's resources, data sources
+                  (data.type.name) and module calls (module.name, type None)
+      references  (address, referenced address) candidates from every expression
+                  and depends_on in those blocks; resolved by TerraformModel
+      module_sources  {module name: source} for the file's module calls (None when
+                  the source is not a plain string)
+      depends_on  (address, filename) pairs for every depends_on entry in the file
+      blocks      (resources, variables, outputs) as TerraformParser builds them,
+                  or None if the file is not valid HCL
+    """
+    summary = {'services': [], 'addresses': {}, 'references': [], 'module_sources': {}, 'depends_on': [], 'blocks': None}
+    try:
+        body = parse_hcl(content)
+    except (HCLSyntaxError, RecursionError) as e:
+        # RecursionError: nesting deeper than the recursive-descent parser can follow
+        print(f"Error parsing {filename}: {e}")
+        return summary
+
+    for block in body.blocks:
+        dependencies = _depends_on_addresses(block.body.attributes.get('depends_on', []))
+        summary['depends_on'].extend((address, filename) for address in dependencies)
+        address = _block_address(block)
+        if address is None:
+            continue
+        if block.type == 'resource':
+            summary['services'].append(block.labels[0])
+        elif block.type == 'module':
+            source = block.body.attributes.get('source')
+            summary['module_sources'][block.labels[0]] = source if isinstance(source, str) else None
+        summary['addresses'][address] = None if block.type == 'module' else block.labels[0]
+
+        found = dict.fromkeys(dependencies)
+        _body_references(block.body, found)
+        found.pop(address, None)
+        summary['references'].extend((address, target) for target in found)
+
+    summary['blocks'] = _terraform_parser.blocks_from_body(body)
+    return summary
+
+
+def _local_module_directory(directory, source):
+    """The directory a local module source ("./modules/vpc", "../shared") points at, else None."""
+    if not source or not source.startswith(('./', '../')):
+        return None
+    resolved = posixpath.normpath(posixpath.join(directory, source))
+    if resolved == '.':
+        return ''
+    return None if resolved.startswith('../') or resolved == '..' else resolved
+
+
+def _prefixed(module, prefix):
+    """A copy of an expanded module with every address and block name under prefix."""
+    return {
+        'addresses': {prefix + address: resource_type for address, resource_type in module['addresses'].items()},
+        'edges': [(prefix + source, prefix + target) for source, target in module['edges']],
+        'resources': {prefix + address: resource for address, resource in module['resources'].items()},
+        'variables': {prefix + name: variable for name, variable in module['variables'].items()},
+        'outputs': {prefix + name: output for name, output in module['outputs'].items()}
+    }
+
+
+def _merge(module, other):
+    for key in ('addresses', 'resources', 'variables', 'outputs'):
+        module[key].update(other[key])
+    module['edges'].extend(other['edges'])
+
+
+class TerraformModel:
+    """The Terraform side of a project, assembled from one parse_terraform_file per .tf file.
+
+    Each directory of .tf files is a module. Directories that no other
+    module calls through a local source ("./modules/vpc") are root modules;
+    local module calls are expanded in place, so a resource in module "vpc"
+    has the address module.vpc.aws_subnet.public. A module called many
+    times is expanded once and then only re-prefixed. When the project has
+    more than one root module, addresses also carry the root's directory
+    (envs/prod:aws_instance.web) so identically named resources stay apart.
+
+    References are resolved inside the module that makes them, against an
+    index of that module's addresses, so each one is a dictionary lookup.
+    """
+
+    def __init__(self):
+        self._services = set()
+        self._directories = {}
+        self._workspace = None
+
+    def add_file(self, path, summary):
+        """Add the parse_terraform_file summary of the .tf file at relative, '/'-separated path."""
+        self._services.update(summary['services'])
+        self._directories.setdefault(posixpath.dirname(path), []).append(summary)
+        self._workspace = None
+
+    def _expand(self, directory, expanded, active):
+        """Return the module in directory with its local module calls expanded, memoized in expanded."""
+        module = expanded.get(directory)
+        if module is not None:
+            return module
+
+        module = {'addresses': {}, 'edges': [], 'resources': {}, 'variables': {}, 'outputs': {}}
+        summaries = self._directories[directory]
+        calls = {}
+        for summary in summaries:
+            module['addresses'].update(summary['addresses'])
+            calls.update(summary['module_sources'])
+            if summary['blocks'] is not None:
+                resources, variables, outputs = summary['blocks']
+                module['resources'].update(resources)
+                module['variables'].update(variables)
+                module['outputs'].update(outputs)
+        for summary in summaries:
+            module['edges'].extend(
+                (source, target) for source, target in summary['references'] if target in module['addresses']
+            )
+
+        active.add(directory)
+        for name, source in calls.items():
+            child = _local_module_directory(directory, source)
+            # Remote and missing modules stay as a single module.<name> node; so do cyclic calls
+            if child in self._directories and child not in active:
+                _merge(module, _prefixed(self._expand(child, expanded, active), f"module.{name}."))
+        active.discard(directory)
+
+        expanded[directory] = module
+        return module
+
+    def _build_workspace(self):
+        if self._workspace is not None:
+            return self._workspace
+
+        # Root modules are the directories no other module calls through a local source
+        called = set()
+        for directory, summaries in self._directories.items():
+            for summary in summaries:
+                for source in summary['module_sources'].values():
+                    child = _local_module_directory(directory, source)
+                    if child is not None and child != directory:
+                        called.add(child)
+
+        expanded = {}
+        roots = []
+        for root in sorted(directory for directory in self._directories if directory not in called):
+            roots.append(root)
+            self._expand(root, expanded, set())
+        # Modules that only call each other have no root above them; promote them one at a time
+        for directory in sorted(self._directories):
+            if directory not in expanded:
+                roots.append(directory)
+                self._expand(directory, expanded, set())
+
+        workspace = {'addresses': {}, 'edges': [], 'resources': {}, 'variables': {}, 'outputs': {}}
+        for root in roots:
+            prefix = f"{root or '.'}:" if len(roots) > 1 else ''
+            _merge(workspace, _prefixed(expanded[root], prefix))
+        self._workspace = workspace
+        return workspace
+
+    @property
+    def services(self):
+        """Resource types declared anywhere in the project."""
+        return list(self._services)
+
+    @property
+    def dependency_graph(self):
+        """{address: [addresses it depends on]} for every resource, data source and module call.
+
+        Edges come from depends_on and from references in the block's
+        expressions (aws_s3_bucket.logs.arn, module.vpc.subnet_ids, ...),
+        kept only when the referenced address is declared in the same module.
+        """
+        workspace = self._build_workspace()
+        graph = {address: {} for address in workspace['addresses']}
+        for source, target in workspace['edges']:
+            graph[source][target] = None
+        return {address: list(targets) for address, targets in graph.items()}
+
+    @property
+    def connections(self):
+        """Dependency edges between resource types, limited to types the project declares."""
+        workspace = self._build_workspace()
+        addresses = workspace['addresses']
+        edges = {}
+        for source, target in workspace['edges']:
+            dependency_type, resource_type = addresses[target], addresses[source]
+            if dependency_type != resource_type and dependency_type in self._services and resource_type in self._services:
+                edges[(dependency_type, resource_type)] = None
+        return list(edges)
+
+    @property
+    def terraform_data(self):
+        """Resources, variables, outputs and diagram data for AWSInfrastructureDiagramGenerator."""
+        workspace = self._build_workspace()
+        return _terraform_parser.build_terraform_data([
+            (workspace['resources'], workspace['variables'], workspace['outputs'])
+        ])
@@ -1,8 +1,7 @@
 # -*- coding: utf-8 -*-
-import os
-import re
-import json
 from typing import Dict, List, Tuple, Any
+from .source_tree import as_source
+from .hcl_parser import parse_hcl, Body
 
 class TerraformParser:
     """Parse Terraform files to extract AWS resources and their configurations."""
@@ -24,27 +23,37 @@ class TerraformParser:
             'aws_iam_role': {'type': 'security', 'name': 'IAM Role', 'icon': '🔐', 'category': 'Security'},
         }
     
-    def parse_terraform_directory(self, directory_path: str) -> Dict[str, Any]:
-        """Parse all Terraform files in a directory."""
-        terraform_files = self._find_terraform_files(directory_path)
+    def parse_terraform_directory(self, directory_path) -> Dict[str, Any]:
+        """Parse all Terraform files in a directory path or source_tree object (e.g. a ZipSource).
         
-        all_resources = {}
-        all_variables = {}
-        all_outputs = {}
+        Root modules are kept apart and local module calls are expanded, see TerraformModel.
+        """
+        from .terraform_model import TerraformModel, parse_terraform_file
         
+        source = as_source(directory_path)
+        terraform_files = self._find_terraform_files(source)
+        
+        model = TerraformModel()
         for tf_file in terraform_files:
             try:
-                content = self._read_file(tf_file)
-                resources, variables, outputs = self._parse_terraform_content(content)
-                
-                # Merge results
-                all_resources.update(resources)
-                all_variables.update(variables)
-                all_outputs.update(outputs)
-                
+                content = self._read_file(source, tf_file)
             except Exception as e:
                 print(f"Error parsing {tf_file}: {e}")
                 continue
+            model.add_file(tf_file, parse_terraform_file(content, tf_file))
+        
+        return model.terraform_data
+    
+    def build_terraform_data(self, parsed_files: List[Tuple[Dict, Dict, Dict]]) -> Dict[str, Any]:
+        """Merge per-file (resources, variables, outputs) tuples into diagram-ready data."""
+        all_resources = {}
+        all_variables = {}
+        all_outputs = {}
+        
+        for resources, variables, outputs in parsed_files:
+            all_resources.update(resources)
+            all_variables.update(variables)
+            all_outputs.update(outputs)
         
         return {
             'resources': all_resources,
@@ -53,95 +62,69 @@ class TerraformParser:
             'diagram_data': self._generate_diagram_data(all_resources)
         }
     
-    def _find_terraform_files(self, directory_path: str) -> List[str]:
-        """Find all .tf files in the directory."""
-        tf_files = []
-        for root, dirs, files in os.walk(directory_path):
-            for file in files:
-                if file.endswith('.tf'):
-                    tf_files.append(os.path.join(root, file))
-        return tf_files
+    def _find_terraform_files(self, source) -> List[str]:
+        """Find all .tf files in the source."""
+        return [path for path in source.iter_files() if path.endswith('.tf')]
     
-    def _read_file(self, file_path: str) -> str:
+    def _read_file(self, source, file_path: str) -> str:
         """Read file content."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+        return source.read_bytes(file_path).decode('utf-8')
     
-    def _parse_terraform_content(self, content: str) -> Tuple[Dict, Dict, Dict]:
-        """Parse Terraform content to extract resources, variables, and outputs."""
+    def parse_terraform_content(self, content: str) -> Tuple[Dict, Dict, Dict]:
+        """Parse Terraform content to extract resources, variables, and outputs.
+        
+        Raises HCLSyntaxError (a ValueError) when the content is not valid HCL.
+        """
+        return self.blocks_from_body(parse_hcl(content))
+    
+    def blocks_from_body(self, body: Body) -> Tuple[Dict, Dict, Dict]:
+        """Extract resources, variables, and outputs from an already parsed file."""
         resources = {}
         variables = {}
         outputs = {}
         
-        # Remove comments
-        content = re.sub(r'#.*', '', content)
-        content = re.sub(r'//.*', '', content)
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-        
-        # Parse resource blocks
-        resource_pattern = r'resource\s+"([^"]+)"\s+"([^"]+)"\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        for match in re.finditer(resource_pattern, content, re.DOTALL):
-            resource_type = match.group(1)
-            resource_name = match.group(2)
-            resource_config = match.group(3)
-            
-            resources[f"{resource_type}.{resource_name}"] = {
-                'type': resource_type,
-                'name': resource_name,
-                'config': self._parse_resource_config(resource_config)
-            }
-        
-        # Parse variable blocks
-        variable_pattern = r'variable\s+"([^"]+)"\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        for match in re.finditer(variable_pattern, content, re.DOTALL):
-            var_name = match.group(1)
-            var_config = match.group(2)
-            variables[var_name] = self._parse_resource_config(var_config)
-        
-        # Parse output blocks
-        output_pattern = r'output\s+"([^"]+)"\s*\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}'
-        for match in re.finditer(output_pattern, content, re.DOTALL):
-            output_name = match.group(1)
-            output_config = match.group(2)
-            outputs[output_name] = self._parse_resource_config(output_config)
+        for block in body.blocks:
+            if block.type == 'resource' and len(block.labels) == 2:
+                resource_type, resource_name = block.labels
+                resources[f"{resource_type}.{resource_name}"] = {
+                    'type': resource_type,
+                    'name': resource_name,
+                    'config': self._parse_resource_config(block.body)
+                }
+            elif block.type == 'variable' and len(block.labels) == 1:
+                variables[block.labels[0]] = self._parse_resource_config(block.body)
+            elif block.type == 'output' and len(block.labels) == 1:
+                outputs[block.labels[0]] = self._parse_resource_config(block.body)
         
         return resources, variables, outputs
     
-    def _parse_resource_config(self, config_str: str) -> Dict[str, Any]:
-        """Parse resource configuration block."""
+    def _parse_resource_config(self, body: Body) -> Dict[str, Any]:
+        """Flatten a block body into {attribute: literal value}.
+        
+        String, number and boolean attributes are collected from the block and
+        everything nested in it (blocks, maps, lists of maps), later ones
+        winning; the first tags map is also kept whole under 'tags'.
+        Attributes set from expressions are left out.
+        """
         config = {}
         
-        # Simple key-value pairs
-        kv_pattern = r'(\w+)\s*=\s*"([^"]*)"'
-        for match in re.finditer(kv_pattern, config_str):
-            key = match.group(1)
-            value = match.group(2)
-            config[key] = value
-        
-        # Boolean values
-        bool_pattern = r'(\w+)\s*=\s*(true|false)'
-        for match in re.finditer(bool_pattern, config_str):
-            key = match.group(1)
-            value = match.group(2) == 'true'
-            config[key] = value
-        
-        # Numeric values
-        num_pattern = r'(\w+)\s*=\s*(\d+(?:\.\d+)?)'
-        for match in re.finditer(num_pattern, config_str):
-            key = match.group(1)
-            value = match.group(2)
-            config[key] = float(value) if '.' in value else int(value)
-        
-        # Tags block
-        tags_pattern = r'tags\s*=\s*\{([^{}]*)\}'
-        tags_match = re.search(tags_pattern, config_str)
-        if tags_match:
-            tags_content = tags_match.group(1)
-            tags = {}
-            for match in re.finditer(kv_pattern, tags_content):
-                tags[match.group(1)] = match.group(2)
-            config['tags'] = tags
-        
+        def collect(attributes, blocks):
+            for key, value in attributes.items():
+                if isinstance(value, (str, bool, int, float)):
+                    config[key] = value
+                elif isinstance(value, dict):
+                    first_tags = key == 'tags' and 'tags' not in config
+                    collect(value, [])
+                    if first_tags:
+                        config['tags'] = {k: v for k, v in value.items() if isinstance(v, str)}
+                elif isinstance(value, list):
+                    for item in value:
+                        if isinstance(item, dict):
+                            collect(item, [])
+            for block in blocks:
+                collect(block.body.attributes, block.body.blocks)
+        
+        collect(body.attributes, body.blocks)
         return config
     
     def _generate_diagram_data(self, resources: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,73 @@
+import time
+import threading
+from collections import OrderedDict
+
+class TTLStore:
+    """Thread-safe in-memory store bounded by entry count and age.
+
+    Entries expire ttl seconds after they were last written. When the store
+    is full, the oldest entries are dropped to make room. With a pinned
+    predicate, entries whose value it accepts (a job still running, say)
+    neither expire nor count toward max_entries until a later write unpins them.
+    """
+
+    def __init__(self, max_entries, ttl, pinned=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.pinned = pinned
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time(), value)
+            self._evict()
+
+    def get(self, key):
+        """Return the value for key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            written, value = entry
+            if time.time() - written > self.ttl and not self._is_pinned(value):
+                del self._entries[key]
+                return None
+            return value
+
+    def update(self, key, func):
+        """Apply func to the stored value under the lock and keep the result.
+
+        Refreshes the entry's age. Returns the new value, or None if key is gone.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            value = func(entry[1])
+            self._entries[key] = (time.time(), value)
+            return value
+
+    def _is_pinned(self, value):
+        return self.pinned is not None and self.pinned(value)
+
+    def _evict(self):
+        now = time.time()
+        if self.pinned is not None:
+            evictable = [key for key, (_, value) in self._entries.items() if not self.pinned(value)]
+            excess = len(evictable) - self.max_entries
+            for key in evictable:
+                written = self._entries[key][0]
+                if excess <= 0 and now - written <= self.ttl:
+                    break
+                del self._entries[key]
+                excess -= 1
+            return
+
+        # Entries are kept in write order, so expired ones sit at the front
+        while self._entries:
+            key, (written, _) = next(iter(self._entries.items()))
+            if now - written <= self.ttl and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[key]
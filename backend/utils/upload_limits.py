@@ -0,0 +1,148 @@
+import io
+import os
+import hashlib
+
+# Upload limits, all overridable from the environment
+MAX_ARCHIVE_BYTES = int(os.getenv("INTELLENS_MAX_ARCHIVE_BYTES", str(1024 * 1024 * 1024)))
+MAX_ARCHIVE_MEMBERS = int(os.getenv("INTELLENS_MAX_ARCHIVE_MEMBERS", "100000"))
+MAX_COMPRESSION_RATIO = float(os.getenv("INTELLENS_MAX_COMPRESSION_RATIO", "100"))
+
+# Read size when hashing an upload
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Room for multipart boundaries and headers on top of the archive itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+class UploadRejected(Exception):
+    """Raised when an upload breaks one of the configured limits."""
+
+    def __init__(self, message, status_code=413):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+async def claim_upload(upload_file, max_bytes=None):
+    """Size-check and hash an UploadFile in place, then take its file over.
+
+    Starlette has already spooled the upload to a SpooledTemporaryFile, so it
+    is read once in fixed-size chunks and rewound rather than copied; the read
+    stops as soon as max_bytes is exceeded. Returns (file, sha256_hexdigest).
+    The file is detached from upload_file, so it outlives the request (FastAPI
+    closes request files once the response is sent) and the caller closes it.
+    """
+    max_bytes = MAX_ARCHIVE_BYTES if max_bytes is None else max_bytes
+    digest = hashlib.sha256()
+    total = 0
+    while True:
+        chunk = await upload_file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadRejected(f"Archive exceeds the {max_bytes} byte upload limit")
+        digest.update(chunk)
+    await upload_file.seek(0)
+
+    archive = upload_file.file
+    # Leave FastAPI an empty stand-in to close
+    upload_file.file = io.BytesIO()
+    return archive, digest.hexdigest()
+
+
+def check_archive(zip_file, max_members=None, max_ratio=None):
+    """Reject archives with too many members or a suspicious compression ratio.
+
+    Only the central directory is consulted, so this runs before any member
+    is decompressed. The UploadRejected raised carries status 400: the upload
+    fit the size limit, but its contents are refused.
+    """
+    max_members = MAX_ARCHIVE_MEMBERS if max_members is None else max_members
+    max_ratio = MAX_COMPRESSION_RATIO if max_ratio is None else max_ratio
+
+    infos = zip_file.infolist()
+    if len(infos) > max_members:
+        raise UploadRejected(f"Archive has {len(infos)} members, the limit is {max_members}", status_code=400)
+
+    uncompressed = sum(info.file_size for info in infos)
+    compressed = sum(info.compress_size for info in infos)
+    if uncompressed > max(compressed, 1) * max_ratio:
+        raise UploadRejected(
+            f"Archive expands {uncompressed / max(compressed, 1):.0f}x, the limit is {max_ratio:g}x",
+            status_code=400
+        )
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware that rejects oversized request bodies with 413.
+
+    A Content-Length over the limit is refused before the body is read.
+    Bodies without one (chunked transfer) are counted as they arrive and
+    cut off once they pass the limit.
+    """
+
+    def __init__(self, app, max_body_bytes=None):
+        self.app = app
+        if max_body_bytes is None:
+            max_body_bytes = MAX_ARCHIVE_BYTES + MULTIPART_OVERHEAD_BYTES
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    too_large = int(value) > self.max_body_bytes
+                except ValueError:
+                    too_large = False
+                if too_large:
+                    await _send_too_large(send, self.max_body_bytes)
+                    return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, response_started, rejected
+            message = await receive()
+            if message["type"] == "http.request" and not rejected:
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    # Answer now; whatever error the app produces next is dropped
+                    rejected = True
+                    if not response_started:
+                        response_started = True
+                        await _send_too_large(send, self.max_body_bytes)
+                    raise UploadRejected(f"Request body exceeds {self.max_body_bytes} bytes")
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except UploadRejected:
+            if not rejected:
+                raise
+
+
+async def _send_too_large(send, limit):
+    body = f'{{"error": "Request body exceeds {limit} bytes"}}'.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Test script for section selection in the analysis pipeline."""
+
+import sys
+import os
+import io
+import zipfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils import analysis_pipeline
+from utils.analysis_pipeline import prepare_analysis, build_sections, pipeline_stages
+
+def _archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        zip_ref.writestr('app.py', 'import boto3\n')
+        zip_ref.writestr('index.html', '<h1>Hello</h1>')
+    buffer.seek(0)
+    return buffer
+
+def test_frontend_preview_only_rendered_when_selected():
+    """Leaving frontend_preview out of sections skips rendering it, and its progress stage."""
+    rendered = []
+    original = analysis_pipeline.generate_frontend_preview
+    analysis_pipeline.generate_frontend_preview = lambda *args: rendered.append(args) or original(*args)
+    try:
+        stages = []
+        analysis = prepare_analysis(_archive(), 'demo', progress=lambda stage, status: stages.append(stage),
+                                    sections=['mermaid_syntax'])
+        assert rendered == [] and analysis['frontend_preview'] is None
+        assert set(stages) == {'scan'}
+        assert 'frontend_preview' not in pipeline_stages(['mermaid_syntax'])
+        outputs, _ = build_sections(analysis, ['frontend_preview'])
+        assert outputs['frontend_preview'] == analysis_pipeline.FRONTEND_PREVIEW_UNAVAILABLE
+
+        analysis = prepare_analysis(_archive(), 'demo', sections=['frontend_preview'])
+        assert len(rendered) == 1 and 'Hello' in analysis['frontend_preview']
+        assert 'frontend_preview' in pipeline_stages(['frontend_preview'])
+    finally:
+        analysis_pipeline.generate_frontend_preview = original
+
+if __name__ == "__main__":
+    test_frontend_preview_only_rendered_when_selected()
+    print("\n✅ All tests passed!")
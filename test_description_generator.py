@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Test script for batched language and service descriptions."""
+
+import sys
+import os
+import json
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils import description_generator
+from utils.description_generator import DescriptionGenerator
+from utils.llm_client import llm_budget, llm_section
+
+def _description(name, kind):
+    entry = {
+        'description': f'{name} description',
+        'use_cases': ['one'],
+        'configuration': {},
+        'resource_name': name.lower(),
+        'terraform_config': '# config'
+    }
+    entry['characteristics' if kind == 'language' else 'integration_benefits'] = ['fast']
+    return entry
+
+class _FakeModel:
+    """Stands in for invoke_claude: answers every name it is asked about, except those in skip."""
+
+    def __init__(self, skip=()):
+        self.skip = set(skip)
+        self.prompts = []
+
+    def __call__(self, prompt, max_tokens):
+        self.prompts.append(prompt)
+        languages = json.loads(prompt.split('Programming languages: ', 1)[1].split('\n', 1)[0])
+        services = json.loads(prompt.split('Technologies/services: ', 1)[1].split('\n', 1)[0])
+        return json.dumps({
+            'languages': {name: _description(name, 'language') for name in languages if name not in self.skip},
+            'services': {name: _description(name, 'service') for name in services if name not in self.skip}
+        })
+
+class _Model:
+    """Route the description generator's Bedrock calls to model, and its cache to a dict, within a with block."""
+
+    def __init__(self, model, cache=None):
+        self.patches = {
+            'invoke_claude': model,
+            'get_cached': (cache if cache is not None else {}).get,
+            'set_cached': (cache if cache is not None else {}).__setitem__
+        }
+
+    def __enter__(self):
+        self.saved = {name: getattr(description_generator, name) for name in self.patches}
+        for name, value in self.patches.items():
+            setattr(description_generator, name, value)
+        generator = DescriptionGenerator()
+        generator.client = generator.client or object()
+        return generator
+
+    def __exit__(self, *exc):
+        for name, value in self.saved.items():
+            setattr(description_generator, name, value)
+
+def test_descriptions_are_chunked_by_token_budget():
+    """Items are split into as few prompts as the response budget allows."""
+    generator = DescriptionGenerator()
+    per_chunk = description_generator.DESCRIPTION_BATCH_MAX_TOKENS // description_generator.DESCRIPTION_TOKENS_PER_ITEM
+    items = [('service', f'Service {i}', 1) for i in range(per_chunk * 2 + 1)]
+    chunks = generator._chunk_items(items)
+    assert [len(chunk) for chunk in chunks] == [per_chunk, per_chunk, 1]
+    assert [item for chunk in chunks for item in chunk] == items
+
+def test_missing_items_fall_back_one_by_one():
+    """An item the model leaves out gets its fallback; the rest keep the model's description."""
+    model = _FakeModel(skip={'Redis'})
+    with _Model(model) as generator:
+        languages, services = generator.get_descriptions({'Python': 3}, {'Redis': 2, 'Kafka': 1})
+    assert languages['Python']['description'] == 'Python description'
+    assert services['Kafka']['integration_benefits'] == ['fast']
+    assert services['Redis'] == generator._get_fallback_service_description('Redis', 2)
+    assert len(model.prompts) == 1
+
+def test_descriptions_cached_per_item():
+    """A project that differs by one service only asks the model about that service."""
+    cache = {}
+    model = _FakeModel()
+    with _Model(model, cache) as generator:
+        generator.get_descriptions({'Python': 3}, {'Redis': 2, 'Kafka': 1})
+        languages, services = generator.get_descriptions({'Python': 1}, {'Redis': 1, 'Kafka': 1, 'Celery': 4})
+    assert len(model.prompts) == 2
+    assert 'Celery' in model.prompts[1] and 'Redis' not in model.prompts[1] and 'Python' not in model.prompts[1]
+    assert languages['Python']['description'] == 'Python description'
+    assert services['Celery']['description'] == 'Celery description'
+
+def test_truncated_reply_keeps_complete_items():
+    """A reply cut off at max_tokens keeps every entry that was complete and falls back for the rest."""
+    full = _FakeModel()
+    def truncated(prompt, max_tokens):
+        reply = full(prompt, max_tokens)
+        return reply[:reply.index('"Kafka"') + 20]
+
+    with _Model(truncated) as generator:
+        languages, services = generator.get_descriptions({'Python': 3}, {'Redis': 2, 'Kafka': 1})
+    assert languages['Python']['description'] == 'Python description'
+    assert services['Redis']['description'] == 'Redis description'
+    assert services['Kafka'] == generator._get_fallback_service_description('Kafka', 1)
+
+def test_waiting_on_stalled_request_respects_budget():
+    """An item another request is stuck fetching falls back once this caller's budget is spent."""
+    stalled = description_generator.Future()
+    description_generator._in_flight[('service', 'Redis')] = stalled
+    try:
+        with _Model(_FakeModel()) as generator:
+            started = time.monotonic()
+            with llm_budget(0.05) as degraded:
+                with llm_section('aws_infrastructure_diagram'):
+                    languages, services = generator.get_descriptions({'Python': 3}, {'Redis': 2})
+        assert time.monotonic() - started < 1
+        assert languages['Python']['description'] == 'Python description'
+        assert services['Redis'] == generator._get_fallback_service_description('Redis', 2)
+        assert degraded == {'aws_infrastructure_diagram'}
+    finally:
+        description_generator._in_flight.pop(('service', 'Redis'), None)
+
+if __name__ == "__main__":
+    test_descriptions_are_chunked_by_token_budget()
+    test_missing_items_fall_back_one_by_one()
+    test_descriptions_cached_per_item()
+    test_truncated_reply_keeps_complete_items()
+    test_waiting_on_stalled_request_respects_budget()
+    print("\n✅ All tests passed!")
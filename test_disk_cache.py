@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Test script for the on-disk JSON cache behind the LLM and result caches."""
+
+import sys
+import os
+import time
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.disk_cache import DiskCache
+
+def test_cache_round_trip_and_ttl():
+    """Values come back as stored until the ttl runs out."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=1024 * 1024, ttl=0.05)
+        cache.set("prompt", {"text": "answer", "tokens": [1, 2]})
+        assert cache.get("prompt") == {"text": "answer", "tokens": [1, 2]}
+        assert cache.get("other") is None
+
+        time.sleep(0.06)
+        assert cache.get("prompt") is None
+        assert os.listdir(directory) == []
+
+def test_cache_evicts_least_recently_used():
+    """Past max_bytes the entries read longest ago are deleted first."""
+    with tempfile.TemporaryDirectory() as directory:
+        value = "x" * 1000
+        cache = DiskCache(directory, max_bytes=2500)
+        cache.set("a", value)
+        cache.set("b", value)
+        # Entry a was written first but read since, so b is now the least recently used
+        past = time.time() - 10
+        os.utime(cache._path("b"), (past, past))
+        os.utime(cache._path("a"), (past - 5, past - 5))
+        assert cache.get("a") == value
+        cache.set("c", value)
+        assert cache.get("b") is None
+        assert cache.get("a") == value and cache.get("c") == value
+
+def test_cache_survives_corrupt_entries():
+    """A truncated or garbled entry reads as a miss and is replaced by the next write."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=1024 * 1024)
+        cache.set("prompt", "answer")
+        with open(cache._path("prompt"), "w") as f:
+            f.write('{"created": 1, "val')
+        assert cache.get("prompt") is None
+        with open(cache._path("prompt"), "w") as f:
+            f.write('["not", "an", "entry"]')
+        assert cache.get("prompt") is None
+
+        cache.set("prompt", "fresh")
+        assert cache.get("prompt") == "fresh"
+
+if __name__ == "__main__":
+    test_cache_round_trip_and_ttl()
+    test_cache_evicts_least_recently_used()
+    test_cache_survives_corrupt_entries()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Test script for the per-file analysis cache used by rescans."""
+
+import sys
+import os
+import hashlib
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils import repository_scanner
+from utils.repository_scanner import scan_repository, analyze_file
+from utils.file_analysis_cache import FileAnalysisCache
+from utils.reference_table import references_to_dicts
+
+TERRAFORM = '''
+resource "aws_s3_bucket" "logs" {}
+resource "aws_instance" "web" {
+  user_data  = aws_s3_bucket.logs.arn
+  depends_on = [aws_s3_bucket.logs]
+}
+'''
+
+def _blob(content):
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+def _snapshot(scan):
+    return (
+        scan.languages, references_to_dicts(scan.services_with_refs), scan.connections, scan.file_details,
+        sorted(scan.tf_services), scan.tf_connections, scan.terraform_data
+    )
+
+def test_second_scan_served_from_cache():
+    """Rescanning an unchanged tree gives the same result without analyzing any file again."""
+    project_dir = os.path.join(os.path.dirname(__file__), 'terraform')
+    with tempfile.TemporaryDirectory() as directory:
+        cache = FileAnalysisCache(os.path.join(directory, 'files.sqlite3'), repository_scanner.SCAN_VERSION)
+        first = scan_repository(project_dir, workers=1, cache=cache)
+
+        analyzed = []
+        original = repository_scanner.analyze_file
+        repository_scanner.analyze_file = lambda path, content: analyzed.append(path) or original(path, content)
+        try:
+            second = scan_repository(project_dir, workers=1, cache=cache)
+        finally:
+            repository_scanner.analyze_file = original
+        assert analyzed == []
+        assert _snapshot(second) == _snapshot(first)
+        assert first.tf_connections
+
+def test_round_trip_and_moved_files():
+    """A stored result comes back equal to analyze_file's, tuples included, under whatever path the blob has now."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = FileAnalysisCache(os.path.join(directory, 'files.sqlite3'), 'v1')
+        result = analyze_file('infra/main.tf', TERRAFORM)
+        cache.put_many([(_blob(TERRAFORM), result)])
+
+        assert cache.get_many([('infra/main.tf', _blob(TERRAFORM))]) == {'infra/main.tf': result}
+        moved = cache.get_many([('modules/storage/main.tf', _blob(TERRAFORM))])['modules/storage/main.tf']
+        assert moved == analyze_file('modules/storage/main.tf', TERRAFORM)
+        assert isinstance(moved['connections'][0], tuple)
+        assert isinstance(moved['terraform']['references'][0], tuple)
+
+        # Same content under another file name is a different entry (names drive language detection)
+        assert cache.get_many([('infra/other.tf', _blob(TERRAFORM))]) == {}
+
+def test_versions_and_pruning():
+    """Entries from another scanner version are ignored and pruned; overflow drops the least recently used."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'files.sqlite3')
+        old = FileAnalysisCache(path, 'v1')
+        old.put_many([(_blob(TERRAFORM), analyze_file('main.tf', TERRAFORM))])
+
+        cache = FileAnalysisCache(path, 'v2', max_entries=10)
+        assert cache.get_many([('main.tf', _blob(TERRAFORM))]) == {}
+
+        # Pruning runs once every 1000 stored rows
+        contents = [f'x = {i}\n' for i in range(1000)]
+        cache.put_many([(_blob(content), analyze_file('app.py', content)) for content in contents])
+        assert cache._conn.execute("SELECT COUNT(*) FROM file_results").fetchone()[0] == 10
+        assert cache._conn.execute("SELECT COUNT(*) FROM file_results WHERE version = 'v1'").fetchone()[0] == 0
+
+if __name__ == "__main__":
+    test_second_scan_served_from_cache()
+    test_round_trip_and_moved_files()
+    test_versions_and_pruning()
+    print("\n✅ All tests passed!")
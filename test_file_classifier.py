@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Test script for content-based binary file detection."""
+
+import sys
+import os
+import io
+import zipfile
+import tempfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.file_classifier import SNIFF_BYTES, looks_binary, is_binary_file, is_binary_member
+from utils.repository_scanner import scan_repository
+from utils.source_tree import ZipSource
+
+PNG = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x01\x00' + bytes(range(256)) * 4
+
+def test_text_is_not_binary():
+    """Source files, empty files, UTF-8 and Latin-1 text are all text."""
+    assert not looks_binary(b'')
+    assert not looks_binary(b'import boto3\n\ts3 = boto3.client("s3")\r\n')
+    assert not looks_binary('# Résumé: ünïcödé ✓ 日本語\n'.encode('utf-8') * 50)
+    assert not looks_binary('caf\xe9 cr\xe8me br\xfbl\xe9e\n'.encode('latin-1') * 50)
+    assert not looks_binary(b'\x1b[31mred\x1b[0m\n')
+
+def test_binary_is_binary():
+    """NUL bytes, or mostly control and non-UTF-8 high bytes, mean binary."""
+    assert looks_binary(PNG)
+    assert looks_binary(b'text with one \x00 NUL')
+    assert looks_binary(bytes([0x01, 0x02, 0x03, 0x7f, 0x41]) * 100)
+    assert looks_binary(bytes(range(128, 256)) * 10)
+
+def test_utf16_with_bom_is_text():
+    """UTF-16 text is full of NUL bytes, but its byte order mark gives it away."""
+    text = 'resource "aws_s3_bucket" "logs" {}\n'
+    assert not looks_binary(text.encode('utf-16'))
+    assert not looks_binary(b'\xfe\xff' + text.encode('utf-16-be'))
+    # Without a BOM there is no telling it from binary data
+    assert looks_binary(text.encode('utf-16-le'))
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        zip_ref.writestr('main.tf', text.encode('utf-16'))
+    with zipfile.ZipFile(buffer) as zip_ref:
+        assert scan_repository(ZipSource(zip_ref), workers=1).tf_services == ['aws_s3_bucket']
+
+def test_multibyte_character_cut_at_sample_end():
+    """A UTF-8 character split by the SNIFF_BYTES boundary must not make the file look binary."""
+    text = ('日本語のテキスト ' * 2000).encode('utf-8')
+    # The last three-byte character starting before the boundary
+    start = max(i for i in range(SNIFF_BYTES - 8, SNIFF_BYTES) if text[i] & 0xC0 == 0xC0)
+    for cut in (1, 2):
+        sample = text[:start + cut]
+        assert not looks_binary(sample)
+
+    with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as f:
+        f.write(text)
+    try:
+        assert not is_binary_file(f.name)
+    finally:
+        os.remove(f.name)
+
+def test_zip_members_sniffed_by_content():
+    """Archive members are classified from their own bytes, whatever their extension."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        zip_ref.writestr('logo.txt', PNG)
+        zip_ref.writestr('Makefile.bin', b'all:\n\techo hi\n')
+    with zipfile.ZipFile(buffer) as zip_ref:
+        assert is_binary_member(zip_ref, zip_ref.getinfo('logo.txt'))
+        assert not is_binary_member(zip_ref, zip_ref.getinfo('Makefile.bin'))
+
+if __name__ == "__main__":
+    test_text_is_not_binary()
+    test_binary_is_binary()
+    test_utf16_with_bom_is_text()
+    test_multibyte_character_cut_at_sample_end()
+    test_zip_members_sniffed_by_content()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Test script for the shared Bedrock client: circuit breaker, latency budget and degraded sections."""
+
+import sys
+import os
+import json
+import time
+import contextvars
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils import llm_client
+from utils.llm_client import (
+    CircuitBreaker, LLMUnavailable, invoke_claude, stream_claude, llm_budget, llm_section, mark_degraded
+)
+from utils.readme_generator import stream_readme_events
+
+class _Patched:
+    """Swap llm_client globals for the duration of a with block."""
+
+    def __init__(self, **values):
+        self.values = values
+        self.saved = {}
+
+    def __enter__(self):
+        for name, value in self.values.items():
+            self.saved[name] = getattr(llm_client, name)
+            setattr(llm_client, name, value)
+
+    def __exit__(self, *exc):
+        for name, value in self.saved.items():
+            setattr(llm_client, name, value)
+
+
+def _failing_model(prompt, max_tokens):
+    raise RuntimeError("bedrock down")
+
+
+class _StreamingClient:
+    """Stands in for the bedrock-runtime client, streaming the given text deltas."""
+
+    def __init__(self, deltas, delay=0):
+        self.deltas = deltas
+        self.delay = delay
+
+    def invoke_model_with_response_stream(self, **kwargs):
+        def events():
+            for text in self.deltas:
+                time.sleep(self.delay)
+                yield {'chunk': {'bytes': json.dumps({'type': 'content_block_delta', 'delta': {'type': 'text_delta', 'text': text}})}}
+        return {'body': events()}
+
+
+def _open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record(False, 0)
+    assert not breaker.allow_request()
+
+
+def test_breaker_opens_and_recovers():
+    """Consecutive failures open the breaker; after the reset one trial decides whether it closes."""
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1, reset_seconds=0.05)
+    assert breaker.allow_request()
+    breaker.record(False, 0)
+    assert breaker.allow_request()
+    breaker.record(True, 2)  # too slow, counts as a failure
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one trial at a time
+    breaker.record(False, 0)
+    assert not breaker.allow_request()  # a failed trial reopens it
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record(True, 0)
+    assert breaker.allow_request() and breaker.allow_request()
+
+
+def test_breaker_refuses_invoke_claude():
+    """invoke_claude stops calling Bedrock once the breaker is open, and a good trial closes it."""
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=30, reset_seconds=0.05)
+    with _Patched(_breaker=breaker, _response_cache=None, _invoke_model=_failing_model):
+        for attempt in range(2):
+            try:
+                invoke_claude(f"breaker prompt {attempt}", 10)
+                assert False, "expected the Bedrock error"
+            except RuntimeError:
+                pass
+        try:
+            invoke_claude("breaker prompt 2", 10)
+            assert False, "expected the breaker to refuse"
+        except LLMUnavailable:
+            pass
+
+    time.sleep(0.06)
+    with _Patched(_breaker=breaker, _response_cache=None, _invoke_model=lambda prompt, max_tokens: "ok"):
+        assert invoke_claude("breaker prompt 3", 10) == "ok"
+        assert breaker.allow_request()
+
+
+def test_half_open_trial_released_when_stream_closed():
+    """A streaming trial abandoned by its client must not leave the breaker stuck open."""
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=30, reset_seconds=0.05)
+    _open_breaker(breaker)
+    time.sleep(0.06)
+    with _Patched(_breaker=breaker, _response_cache=None, get_bedrock_client=lambda: _StreamingClient(["a", "b"])):
+        stream = stream_claude("stream prompt", 10)
+        assert next(stream) == "a"
+        stream.close()
+    assert breaker.allow_request()
+
+
+def test_half_open_trial_released_on_cache_hit():
+    """A trial whose answer turned up in the cache before it ran still frees the half-open slot."""
+    class Cache:
+        def get(self, key):
+            return "cached"
+
+        def set(self, key, value):
+            pass
+
+    cache = Cache()
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=30, reset_seconds=0.05)
+    _open_breaker(breaker)
+    time.sleep(0.06)
+    with _Patched(_breaker=breaker, _response_cache=cache):
+        assert breaker.allow_request()
+        assert llm_client._call_and_cache("cached prompt", 10, "key") == "cached"
+    assert breaker.allow_request()
+
+
+def test_budget_and_degraded_sections():
+    """A spent budget refuses calls, and mark_degraded records the current section."""
+    with _Patched(_breaker=CircuitBreaker(5, 30, 60), _response_cache=None, _invoke_model=lambda prompt, max_tokens: "ok"):
+        with llm_budget(0) as degraded:
+            with llm_section("readme_content"):
+                try:
+                    invoke_claude("budget prompt", 10)
+                    assert False, "expected the budget to be spent"
+                except LLMUnavailable:
+                    mark_degraded()
+            mark_degraded()  # outside a section: nothing to record
+        assert degraded == {"readme_content"}
+
+        with llm_budget(5) as degraded:
+            assert invoke_claude("budget prompt", 10) == "ok"
+        assert degraded == set()
+
+def test_readme_stream_stops_at_budget():
+    """A slow README stream is cut off at the budget and the unfinished parts come from the fallback."""
+    deltas = ["## Description\nA demo app.\n\n", "## Architecture Overview\nHalf a sent", "ence.\n", "## Key Files\n"]
+    client = _StreamingClient(deltas, delay=0.04)
+    breaker = CircuitBreaker(5, 30, 60)
+    with _Patched(_breaker=breaker, _response_cache=None, get_bedrock_client=lambda: client):
+        events = stream_readme_events({'Python': 2}, {'AWS S3': 1}, [{'file': 'app.py'}], 'demo', 0.06)
+        received = []
+        while True:
+            # As Starlette does, advance the generator in a fresh copy of the context every time
+            try:
+                received.append(contextvars.copy_context().run(next, events))
+            except StopIteration:
+                break
+
+    deltas_sent = [data['text'] for event, data in received if event == 'delta']
+    assert 0 < len(deltas_sent) < len(deltas)
+    sections = [data['name'] for event, data in received if event == 'section']
+    assert 'overview' in sections and 'setup' in sections and 'description' not in sections
+    event, data = received[-1]
+    assert event == 'done' and data['degraded']
+    assert 'A demo app.' in data['readme'] and 'Half a sent' not in data['readme']
+    assert breaker.allow_request() and breaker.allow_request()
+
+if __name__ == "__main__":
+    test_breaker_opens_and_recovers()
+    test_breaker_refuses_invoke_claude()
+    test_half_open_trial_released_when_stream_closed()
+    test_half_open_trial_released_on_cache_hit()
+    test_budget_and_degraded_sections()
+    test_readme_stream_stops_at_budget()
+    print("\n✅ All tests passed!")
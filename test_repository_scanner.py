@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Test script for the single-pass repository scanner."""
+
+import sys
+import os
+import io
+import zipfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.repository_scanner import scan_repository, analyze_file
+from utils.auto_language_detector import auto_detect_languages
+from utils.auto_service_detector import detect_all_services_with_references
+from utils.parser import parse_terraform_files
+from utils.terraform_parser import TerraformParser
+from utils.source_tree import ZipSource
+from utils.reference_table import ReferencePool, references_to_dicts, dump_references, load_references
+
+def test_scanner_matches_legacy_walkers():
+    """The single pass should produce what the separate walkers produced."""
+    print("Testing Repository Scanner...")
+
+    project_dir = os.path.join(os.path.dirname(__file__), 'backend')
+    terraform_dir = os.path.join(os.path.dirname(__file__), 'terraform')
+
+    scan = scan_repository(project_dir)
+    assert scan.languages == auto_detect_languages(project_dir)
+    assert references_to_dicts(scan.services_with_refs) == detect_all_services_with_references(project_dir)
+    print(f"Found {len(scan.languages)} languages, {len(scan.services_with_refs)} services, {len(scan.file_details)} files")
+
+    tf_scan = scan_repository(terraform_dir)
+    tf_services, tf_connections = parse_terraform_files(terraform_dir)
+    assert sorted(tf_scan.tf_services) == sorted(tf_services)
+    assert tf_scan.tf_connections == tf_connections
+    assert tf_scan.terraform_data['resources'] == TerraformParser().parse_terraform_directory(terraform_dir)['resources']
+    print(f"Found {len(tf_scan.terraform_data['resources'])} Terraform resources")
+
+def test_scanner_reads_zip_in_place():
+    """Scanning an archive directly should match scanning its extracted tree."""
+    terraform_dir = os.path.join(os.path.dirname(__file__), 'terraform')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        for root, _, files in os.walk(terraform_dir):
+            for file in files:
+                full_path = os.path.join(root, file)
+                zip_ref.write(full_path, os.path.relpath(full_path, terraform_dir))
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        zip_scan = scan_repository(ZipSource(zip_ref))
+    dir_scan = scan_repository(terraform_dir)
+    assert zip_scan.languages == dir_scan.languages
+    assert references_to_dicts(zip_scan.services_with_refs) == references_to_dicts(dir_scan.services_with_refs)
+    assert zip_scan.terraform_data == dir_scan.terraform_data
+
+def test_scanner_skips_ignored_and_minified():
+    """Vendored directories, ignore-file patterns and minified bundles should not be scanned."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        zip_ref.writestr('.gitignore', 'generated/*\n!generated/keep.py\n')
+        zip_ref.writestr('app.py', 'import boto3\ns3 = boto3.client("s3")\n')
+        zip_ref.writestr('generated/api.py', 's3 = boto3.client("s3")\n')
+        zip_ref.writestr('generated/keep.py', 's3 = boto3.client("s3")\n')
+        zip_ref.writestr('node_modules/aws-sdk/index.js', 'const s3 = new AWS.S3();\n')
+        zip_ref.writestr('static/app.js', ';'.join(f'var a{i}=new AWS.Lambda()' for i in range(500)))
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        scan = scan_repository(ZipSource(zip_ref))
+    files = sorted(ref['file'] for data in references_to_dicts(scan.services_with_refs).values() for ref in data['references'])
+    assert set(files) == {'app.py', 'generated/keep.py'}
+
+def test_references_round_trip():
+    """Columnar references should serialize back to the dicts they were built from."""
+    project_dir = os.path.join(os.path.dirname(__file__), 'backend')
+
+    services_with_refs = detect_all_services_with_references(project_dir)
+    scan = scan_repository(project_dir)
+    assert references_to_dicts(load_references(dump_references(scan.services_with_refs))) == services_with_refs
+    for service, data in scan.services_with_refs.items():
+        assert data['references'].to_dicts(1, 3) == services_with_refs[service]['references'][1:3]
+
+def test_reference_pool_hash_collision():
+    """Excerpts of one line that hash alike must still be stored separately."""
+    class Colliding(str):
+        def __hash__(self):
+            return 1
+
+    pool = ReferencePool()
+    file_id = pool.file_id('app.py')
+    first = pool.add_line(file_id, 3, Colliding('import boto3'))
+    second = pool.add_line(file_id, 3, Colliding('import redis'))
+    assert first != second
+    assert pool.add_line(file_id, 3, Colliding('import boto3')) == first
+    assert pool.text[second:second + len('import redis')] == 'import redis'
+
+def test_scanner_survives_deeply_nested_terraform():
+    """A .tf file nested too deeply to parse should be skipped, not fail the scan."""
+    nested = 'locals {\n  a = ' + '[' * 400 + ']' * 400 + '\n}\n'
+    assert analyze_file('main.tf', nested)['terraform']['services'] == []
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_ref:
+        zip_ref.writestr('deep/main.tf', nested)
+        zip_ref.writestr('main.tf', 'resource "aws_s3_bucket" "logs" {}\n')
+
+    with zipfile.ZipFile(buffer) as zip_ref:
+        scan = scan_repository(ZipSource(zip_ref), workers=1)
+    assert scan.tf_services == ['aws_s3_bucket']
+
+if __name__ == "__main__":
+    test_scanner_matches_legacy_walkers()
+    test_scanner_reads_zip_in_place()
+    test_scanner_skips_ignored_and_minified()
+    test_references_round_trip()
+    test_reference_pool_hash_collision()
+    test_scanner_survives_deeply_nested_terraform()
+    print("\n✅ All tests passed!")
@@ -10,6 +10,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
 
 from utils.terraform_parser import TerraformParser
 from utils.aws_diagram_generator import AWSInfrastructureDiagramGenerator
+from utils.terraform_model import TerraformModel, parse_terraform_file
 
 def test_terraform_parser():
     """Test the Terraform parser with sample files."""
@@ -61,6 +62,102 @@ def test_aws_diagram_generator():
         print(f"Error: {e}")
         return None
 
+def test_terraform_parser_nested_blocks():
+    """Deeply nested blocks, heredocs and '#' inside strings should not lose resources or values."""
+    content = '''
+resource "aws_lambda_function" "api" {
+  runtime = "python3.9" # comment
+  environment {
+    variables = {
+      URL = "https://example.com/#anchor"
+    }
+  }
+  dynamic "vpc_config" {
+    for_each = var.vpc
+    content {
+      subnet_ids = [for s in var.subnets : s.id]
+    }
+  }
+}
+
+resource "aws_instance" "web" {
+  user_data = <<-EOT
+    #!/bin/bash
+    echo "resource \"fake\" \"x\" {}"
+  EOT
+  instance_type = "t3.micro"
+}
+'''
+    resources, variables, outputs = TerraformParser().parse_terraform_content(content)
+    assert sorted(resources) == ['aws_instance.web', 'aws_lambda_function.api']
+    assert resources['aws_lambda_function.api']['config']['URL'] == 'https://example.com/#anchor'
+    assert resources['aws_instance.web']['config']['user_data'].startswith('#!/bin/bash')
+    assert resources['aws_instance.web']['config']['instance_type'] == 't3.micro'
+
+def test_terraform_parser_byte_order_mark():
+    """A UTF-8 BOM at the start of a file should not hide its resources."""
+    content = '\ufeffresource "aws_s3_bucket" "logs" {\n  bucket = "logs"\n}\n'
+    resources, _, _ = TerraformParser().parse_terraform_content(content)
+    assert list(resources) == ['aws_s3_bucket.logs']
+    assert parse_terraform_file(content, 'main.tf')['services'] == ['aws_s3_bucket']
+
+def test_terraform_implicit_references():
+    """Attribute references, across files, should become dependency edges just like depends_on."""
+    network = '''
+resource "aws_vpc" "main" {}
+module "vpc" {
+  source = "./vpc"
+  cidr   = aws_vpc.main.cidr_block
+}
+'''
+    app = '''
+data "aws_ami" "ubuntu" {}
+resource "aws_s3_bucket" "logs" {}
+resource "aws_instance" "web" {
+  ami       = data.aws_ami.ubuntu.id
+  subnet_id = module.vpc.subnet_ids[0]
+  user_data = "bucket=${aws_s3_bucket.logs.arn} escaped=$${aws_vpc.main.id}"
+  tags      = { Name = var.name }
+}
+'''
+    model = TerraformModel()
+    model.add_file('network.tf', parse_terraform_file(network, 'network.tf'))
+    model.add_file('app.tf', parse_terraform_file(app, 'app.tf'))
+    graph = model.dependency_graph
+    assert graph['aws_instance.web'] == ['data.aws_ami.ubuntu', 'module.vpc', 'aws_s3_bucket.logs']
+    assert graph['module.vpc'] == ['aws_vpc.main']
+    assert model.connections == [('aws_s3_bucket', 'aws_instance')]
+
+def test_terraform_modules_and_roots():
+    """Local modules are expanded under module.<name>, and each root module keeps its own namespace."""
+    vpc = parse_terraform_file('''
+resource "aws_vpc" "this" {}
+resource "aws_subnet" "a" {
+  vpc_id = aws_vpc.this.id
+}
+''', 'main.tf')
+    env = '''
+module "network" {
+  source = "../../modules/vpc"
+}
+resource "aws_instance" "web" {
+  subnet_id = module.network.subnet_id
+}
+'''
+    model = TerraformModel()
+    model.add_file('modules/vpc/main.tf', vpc)
+    model.add_file('envs/prod/main.tf', parse_terraform_file(env, 'main.tf'))
+    model.add_file('envs/dev/main.tf', parse_terraform_file(env, 'main.tf'))
+    resources = model.terraform_data['resources']
+    assert sorted(resources) == [
+        'envs/dev:aws_instance.web', 'envs/dev:module.network.aws_subnet.a', 'envs/dev:module.network.aws_vpc.this',
+        'envs/prod:aws_instance.web', 'envs/prod:module.network.aws_subnet.a', 'envs/prod:module.network.aws_vpc.this'
+    ]
+    graph = model.dependency_graph
+    assert graph['envs/prod:aws_instance.web'] == ['envs/prod:module.network']
+    assert graph['envs/prod:module.network.aws_subnet.a'] == ['envs/prod:module.network.aws_vpc.this']
+    assert model.connections == [('aws_vpc', 'aws_subnet')]
+
 def main():
     """Run tests."""
     print("=" * 50)
@@ -70,6 +167,11 @@ def main():
     # Test parser
     parser_result = test_terraform_parser()
     
+    test_terraform_parser_nested_blocks()
+    test_terraform_parser_byte_order_mark()
+    test_terraform_implicit_references()
+    test_terraform_modules_and_roots()
+    
     # Test diagram generator
     diagram_result = test_aws_diagram_generator()
     
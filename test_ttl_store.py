@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Test script for the in-memory TTL store behind /jobs and /analysis."""
+
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from utils.ttl_store import TTLStore
+
+def test_store_evicts_oldest_and_expired():
+    """Writes past max_entries drop the oldest entries; entries past the ttl read as missing."""
+    store = TTLStore(max_entries=2, ttl=0.05)
+    for key in ("a", "b", "c"):
+        store.set(key, key)
+    assert store.get("a") is None
+    assert store.get("b") == "b" and store.get("c") == "c"
+
+    time.sleep(0.06)
+    assert store.get("b") is None
+
+def test_running_job_survives_eviction():
+    """A job evicted by count or age while it runs would leave its worker with nowhere to report."""
+    jobs = TTLStore(max_entries=2, ttl=0.05, pinned=lambda job: job["status"] in ("queued", "running"))
+    jobs.set("slow", {"status": "queued", "stages": {"scan": "pending", "readme_content": "skipped"}})
+    jobs.update("slow", lambda job: {**job, "status": "running"})
+
+    # Other uploads finish while the slow job runs, and the slow job outlives the ttl
+    for i in range(5):
+        jobs.set(f"done-{i}", {"status": "completed", "stages": {}})
+    time.sleep(0.06)
+    jobs.set("late", {"status": "completed", "stages": {}})
+    assert jobs.get("done-4") is None
+
+    jobs.update("slow", lambda job: {**job, "stages": {**job["stages"], "scan": "running"}})
+    finished = jobs.update("slow", lambda job: {
+        **job,
+        "status": "completed",
+        "stages": {stage: "skipped" if status == "skipped" else "done" for stage, status in job["stages"].items()}
+    })
+    assert finished["stages"] == {"scan": "done", "readme_content": "skipped"}
+    assert jobs.get("slow")["status"] == "completed"
+
+    # Once finished it is an ordinary entry again
+    time.sleep(0.06)
+    jobs.set("next", {"status": "queued", "stages": {}})
+    assert jobs.get("slow") is None
+    assert jobs.get("next") is not None
+
+if __name__ == "__main__":
+    test_store_evicts_oldest_and_expired()
+    test_running_job_survives_eviction()
+    print("\n✅ All tests passed!")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Test script for upload size limits and archive checks."""
+
+import sys
+import os
+import io
+import asyncio
+import hashlib
+import tempfile
+import zipfile
+
+# Add backend to path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'backend'))
+
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+from utils.upload_limits import UploadRejected, UploadSizeLimitMiddleware, check_archive, claim_upload
+from utils.analysis_pipeline import scan_archive
+
+def _limited_app(max_body_bytes):
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_body_bytes=max_body_bytes)
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"received": len(await request.body())}
+
+    return app
+
+def test_oversized_body_gets_413():
+    """Bodies over the limit are refused, whether or not they declare a Content-Length."""
+    client = TestClient(_limited_app(1024))
+    assert client.post("/upload", content=b"x" * 1000).json() == {"received": 1000}
+
+    response = client.post("/upload", content=b"x" * 2000)
+    assert response.status_code == 413
+    assert "exceeds 1024 bytes" in response.json()["error"]
+
+    chunked = client.post("/upload", content=(b"x" * 600 for _ in range(4)))
+    assert chunked.status_code == 413
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zip_ref:
+        for name, data in members.items():
+            zip_ref.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+def test_zip_bomb_rejected_with_400():
+    """An archive that expands far beyond its size is refused before anything is decompressed."""
+    bomb = _zip({"zeros.txt": b"\0" * (10 * 1024 * 1024)})
+    try:
+        scan_archive(bomb)
+        assert False, "expected the archive to be rejected"
+    except UploadRejected as e:
+        assert e.status_code == 400
+        assert "expands" in e.message
+
+    with zipfile.ZipFile(_zip({f"file{i}.py": "x = 1\n" for i in range(5)})) as zip_ref:
+        check_archive(zip_ref, max_members=5)
+        try:
+            check_archive(zip_ref, max_members=4)
+            assert False, "expected the member limit to apply"
+        except UploadRejected as e:
+            assert e.status_code == 400
+
+def test_upload_claimed_without_copying():
+    """The spooled upload itself is hashed, rewound and handed over; FastAPI closing the request leaves it open."""
+    data = b"PK" + os.urandom(3000)
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024)
+    spooled.write(data)
+    spooled.seek(0)
+    upload = UploadFile(spooled, filename="project.zip")
+
+    archive, archive_hash = asyncio.run(claim_upload(upload))
+    assert archive is spooled
+    assert archive_hash == hashlib.sha256(data).hexdigest()
+    asyncio.run(upload.close())
+    assert archive.read() == data
+    archive.close()
+
+    upload = UploadFile(io.BytesIO(data), filename="project.zip")
+    try:
+        asyncio.run(claim_upload(upload, max_bytes=2000))
+        assert False, "expected the upload to be rejected"
+    except UploadRejected as e:
+        assert e.status_code == 413
+
+if __name__ == "__main__":
+    test_oversized_body_gets_413()
+    test_zip_bomb_rejected_with_400()
+    test_upload_claimed_without_copying()
+    print("\n✅ All tests passed!")